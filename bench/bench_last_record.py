@@ -0,0 +1,52 @@
+"""Benchmark of finding the last record of intermittent (exact_title) meeting activities
+
+Every record of the synthetic week is a short meeting record with its own
+title, so each one is a candidate first record of the meeting steps of the
+default configuration. A forward scan for the last record of each candidate
+then runs to the end of the day, which is the worst case for the search."""
+
+from datetime import timedelta
+import json
+from os import path
+from tempfile import TemporaryDirectory
+
+from synthetic import (CONFIG_FILE, LOG_FILENAME, WEEK_START, get_analysis_time, get_parser,
+                       read_records, use_source, write_log)
+
+_DAY_START = timedelta(hours=7)
+
+def parse_arguments():
+    """Get user-selected options"""
+    parser = get_parser(__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('-r', '--records',
+                        type=int, default=200000,
+                        help='Number of records in the synthetic week')
+    parser.add_argument('-c', '--config',
+                        type=str, default=CONFIG_FILE,
+                        help='Analysis configuration JSON file')
+    return parser.parse_args()
+
+def main():
+    """Time the analysis of a synthetic week of short meeting records"""
+    args = parse_arguments()
+    use_source(args.src)
+    with open(args.config, encoding='utf-8') as fin:
+        config = json.load(fin)
+    with TemporaryDirectory() as folder:
+        filename = path.join(folder, LOG_FILENAME)
+        write_log(filename, _generate_week(args.records))
+        count = len(read_records(filename))
+        seconds = get_analysis_time(filename, config, args.repeat)
+    print(f'{count} records: analysis {seconds:.2f}s (best of {args.repeat})')
+
+def _generate_week(count:int):
+    """Generate one-second meeting records with distinct titles over 7 days"""
+    per_day = count // 7
+    for day in range(7):
+        day_start = WEEK_START + timedelta(days=day) + _DAY_START
+        for second in range(per_day):
+            yield (day_start + timedelta(seconds=second), True, 0x1234,
+                   f'Meet - Nucleus call {day * per_day + second} - Google Chrome', 'chrome.exe')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark of parsing a log file into a record table
+
+The synthetic week mixes active and inactive records, back-dated inactive
+records and records without a window, like the logs written by the tracker.
+The timestamp decoding (next to strptime() as a reference), the line
+parsing and the whole table reader (with and without the parse cache) are
+timed separately."""
+
+from datetime import datetime, timedelta
+from locale import getpreferredencoding
+from os import path, remove
+import random
+from tempfile import TemporaryDirectory
+
+from synthetic import (LOG_FILENAME, WEEK_START, get_best_time, get_parser, read_records,
+                       use_source, write_log)
+
+_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+_DAY_START = timedelta(hours=7)
+_DAY_SECONDS = 14 * 3600
+_TITLES = [
+    ('Meet - Nucleus sync - Google Chrome', 'chrome.exe'),
+    ('Meet - 1:1 Gabriele - Google Chrome', 'chrome.exe'),
+    ('Meet - Tech Stack weekly - Google Chrome', 'chrome.exe'),
+    ('Inbox - Outlook', 'outlook.exe'),
+    ('Cooking FSR spec.docx - Word', 'winword.exe'),
+    ('Zephyr build - Visual Studio Code', 'code.exe'),
+    ('VirtualBox Manager', 'virtualbox.exe'),
+    ('SuccessFactors - Google Chrome', 'chrome.exe'),
+    ('WeLEARN portal - Google Chrome', 'chrome.exe'),
+    ('GlobalProtect', 'pangpa.exe'),
+    ('Random stuff - Notepad', 'notepad.exe'),
+]
+
+def parse_arguments():
+    """Get user-selected options"""
+    parser = get_parser(__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('-r', '--records',
+                        type=int, default=180000,
+                        help='Number of records in the synthetic week')
+    return parser.parse_args()
+
+def main():
+    """Time each stage of parsing a synthetic week"""
+    # pylint: disable=import-outside-toplevel; The modules are imported from the selected folder
+    # pylint: disable=protected-access; The timestamp decoder is timed by itself
+    args = parse_arguments()
+    use_source(args.src)
+    import record
+    from logfile import LogFile
+    encoding = getpreferredencoding(False)
+    with TemporaryDirectory() as folder:
+        filename = path.join(folder, LOG_FILENAME)
+        write_log(filename, _generate_week(args.records, random.Random(args.records)))
+        with open(filename, 'rb') as fin:
+            lines = fin.read().splitlines()[2:]
+        print(f'{len(lines)} records:')
+        stamps = [line[:19].decode(encoding) for line in lines]
+        _print_time('strptime (reference)', get_best_time(
+            lambda: [datetime.strptime(stamp, _DATETIME_FORMAT) for stamp in stamps],
+            args.repeat))
+        if hasattr(record, '_parse_datetime'):
+            _print_time('decode timestamps', get_best_time(
+                lambda: list(map(record._parse_datetime, stamps)), args.repeat))
+        if hasattr(record.Record, 'split_bytes'):
+            _print_time('split lines', get_best_time(
+                lambda: [record.Record.split_bytes(line, encoding) for line in lines],
+                args.repeat))
+        if hasattr(LogFile, 'read_table'):
+            cache_filename = f'{filename}c'
+            _print_time('read table (no cache)', get_best_time(
+                LogFile.read_table, args.repeat,
+                lambda: _remove_file(cache_filename) or filename))
+            _print_time('read table (cached)', get_best_time(
+                lambda: LogFile.read_table(filename), args.repeat))
+        else:
+            _print_time('read records', get_best_time(
+                lambda: read_records(filename), args.repeat))
+
+def _generate_week(count:int, rnd:random.Random):
+    """Generate records about every 2 seconds (on average) from 7:00 of each day"""
+    per_day = count // 7
+    for day in range(7):
+        start = WEEK_START + timedelta(days=day) + _DAY_START
+        title, app = rnd.choice(_TITLES)
+        active = True
+        for _ in range(per_day):
+            if rnd.random() < 0.6:
+                title, app = rnd.choice(_TITLES)
+            if rnd.random() < 0.15:
+                active = not active
+            back_dated = 0 if active or rnd.random() < 0.5 else rnd.randint(0, 400)
+            hwnd = -1 if rnd.random() < 0.02 else rnd.randint(0, 0xFFFFF)
+            yield start - timedelta(seconds=back_dated), active, hwnd, title, app
+            start += timedelta(seconds=rnd.randint(1, 2 * _DAY_SECONDS // per_day))
+
+def _print_time(name:str, seconds:float):
+    print(f'  {name:24} {seconds:6.3f}s')
+
+def _remove_file(filename:str):
+    if path.exists(filename):
+        remove(filename)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark of the memory use and the field access time of Record objects
+
+The records share their title and app strings, so the memory per record is
+the record itself, its start time and its cached fields."""
+
+from datetime import timedelta
+import timeit
+import tracemalloc
+
+from synthetic import WEEK_START, get_parser, use_source
+
+_FIELDS = ('start', 'day', 'date', 'weekday', 'time_of_day')
+
+def parse_arguments():
+    """Get user-selected options"""
+    parser = get_parser(__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('-r', '--records',
+                        type=int, default=200000,
+                        help='Number of records to create')
+    parser.add_argument('-n', '--number',
+                        type=int, default=1000000,
+                        help='Number of field accesses per timed run')
+    return parser.parse_args()
+
+def main():
+    """Measure the memory per record and the access time of its fields"""
+    # pylint: disable=import-outside-toplevel; The modules are imported from the selected folder
+    args = parse_arguments()
+    use_source(args.src)
+    from record import Record
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = _create_records(Record, args.records)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f'{len(records)} records: {size / len(records):.0f} bytes per record '
+          '(with its start time)')
+    record = records[len(records) // 2]
+    for name in _FIELDS:
+        if hasattr(record, name):
+            seconds = min(timeit.repeat(f'record.{name}', globals={'record': record},
+                                        number=args.number, repeat=args.repeat))
+            print(f'  {name:12} {1e9 * seconds / args.number:6.1f} ns')
+
+def _create_records(record_class, count:int) -> list:
+    """Create records the way every version of Record allows (the start is set last)"""
+    records = []
+    for index in range(count):
+        record = record_class(True, 0x1234, 'Inbox - Outlook', 'outlook.exe')
+        record.start = WEEK_START + timedelta(seconds=2 * index)
+        records.append(record)
+    return records
+
+if __name__ == '__main__':
+    main()
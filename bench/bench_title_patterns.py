@@ -0,0 +1,105 @@
+"""Benchmark of the title patterns of a configuration with 200 steps
+
+Each step matches the titles that contain one of 10 made-up names, so the
+configuration has 600 compiled title patterns (first rule, last rule and
+continuity) that are alternations of literal names, like the meeting and
+project patterns of the default configuration. The synthetic week has 100k
+records with 20k distinct titles of 3 names each."""
+
+from datetime import timedelta
+import json
+from os import makedirs, path
+import random
+from tempfile import TemporaryDirectory
+
+from synthetic import (CONFIG_FILE, LOG_FILENAME, WEEK_START, get_analysis_time, get_best_time,
+                       get_parser, read_records, use_source, write_log)
+
+_APPS = ['chrome.exe', 'code.exe', 'outlook.exe', 'teams.exe']
+_DAY_START = timedelta(hours=7)
+_NAMES_PER_STEP = 10
+_SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ra', 'to', 'vu', 'shi', 'an', 'dre',
+              'gio', 'ben', 'tor', 'el', 'la', 'ste', 'fan', 'mar', 'co', 'pi']
+_WINDOWS = ['Google Chrome', 'Visual Studio Code', 'Outlook']
+
+def parse_arguments():
+    """Get user-selected options"""
+    parser = get_parser(__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--steps',
+                        type=int, default=200,
+                        help='Number of steps in the configuration')
+    parser.add_argument('-r', '--records',
+                        type=int, default=100000,
+                        help='Number of records in the synthetic week')
+    parser.add_argument('--titles',
+                        type=int, default=20000,
+                        help='Number of distinct titles in the synthetic week')
+    parser.add_argument('--save',
+                        type=str, metavar='FOLDER',
+                        help='Also save the configuration and the log file in the folder')
+    return parser.parse_args()
+
+def main():
+    """Time the title patterns alone and the whole analysis"""
+    # pylint: disable=import-outside-toplevel; The modules are imported from the selected folder
+    # pylint: disable=protected-access; The steps are compiled without the analysis
+    args = parse_arguments()
+    use_source(args.src)
+    import analyze
+    import step
+    rnd = random.Random(7)
+    names = sorted({_get_name(rnd) for _ in range(5000)})
+    config = _get_config(args.steps, names, rnd)
+    with TemporaryDirectory() as folder:
+        folder = args.save or folder
+        makedirs(folder, exist_ok=True)
+        with open(path.join(folder, 'analysis.json'), 'w', encoding='utf-8') as fout:
+            json.dump(config, fout, indent=1)
+        filename = path.join(folder, LOG_FILENAME)
+        write_log(filename, _generate_week(args.records, args.titles, names, rnd))
+        records = read_records(filename)
+        print(f'{len(records)} records, {args.steps} steps:')
+        if hasattr(step, '_MatchCache'):
+            _print_time('match titles', get_best_time(
+                lambda steps: _match_titles(steps, records.strings), args.repeat,
+                lambda: analyze._define_steps(config)))
+        _print_time('analysis', get_analysis_time(filename, config, args.repeat))
+
+def _generate_week(count:int, title_count:int, names:list[str], rnd:random.Random):
+    """Generate records every 1 to 7 seconds (4 on average) from 7:00 of each day"""
+    titles = [f'{" ".join(rnd.sample(names, 3))} - {rnd.choice(_WINDOWS)} #{index}'
+              for index in range(title_count)]
+    per_day = count // 7
+    for day in range(7):
+        start = WEEK_START + timedelta(days=day) + _DAY_START
+        for _ in range(per_day):
+            start += timedelta(seconds=rnd.randint(1, 7))
+            yield (start, rnd.random() < 0.8, rnd.randint(1, 99999),
+                   rnd.choice(titles), rnd.choice(_APPS))
+
+def _get_config(step_count:int, names:list[str], rnd:random.Random) -> dict:
+    """Get the default configuration with steps that each tag the titles with 10 names"""
+    with open(CONFIG_FILE, encoding='utf-8') as fin:
+        config = json.load(fin)
+    config['steps'] = []
+    for index in range(step_count):
+        title = f'({"|".join(rnd.sample(names, _NAMES_PER_STEP))})'
+        config['steps'].append({'activity': f'Project {index}',
+                                'first': {'title': title, 'active': True},
+                                'last': {'title': title, 'continuous': ['title']}})
+    return config
+
+def _get_name(rnd:random.Random) -> str:
+    return ''.join(rnd.choice(_SYLLABLES) for _ in range(rnd.randint(2, 4))).capitalize()
+
+def _match_titles(steps:list, strings:list[str]) -> int:
+    """Search every distinct string with every title pattern (returns the number of matches)"""
+    caches = [rule.title for step in steps
+              for rule in (step.first_rule, step.last_rule, step.continuous) if rule and rule.title]
+    return sum(cache.search(strings, index) for cache in caches for index in range(len(strings)))
+
+def _print_time(name:str, seconds:float):
+    print(f'  {name:14} {seconds:6.2f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic activity logs and timing helpers shared by the benchmarks"""
+
+from argparse import ArgumentParser
+from datetime import datetime
+from locale import getpreferredencoding
+from pathlib import Path
+import sys
+import time
+
+_HEADER_TEXT = 'Time\tUser_Active\tWindow_Handle\tTitle\tApplication'
+_NO_HWND = '--------'
+_ROOT_FOLDER = Path(__file__).resolve().parents[1]
+
+CONFIG_FILE = str(_ROOT_FOLDER / 'dist' / 'analysis.json')
+WEEK_START = datetime(2023, 1, 2)       # Monday
+LOG_FILENAME = f'user-{WEEK_START:%Y-%m-%d}.tab'
+
+def get_parser(description:str) -> ArgumentParser:
+    """Get a parser with the options of every benchmark"""
+    parser = ArgumentParser()
+    parser.description = description
+    parser.add_argument('--src',
+                        type=str, default=str(_ROOT_FOLDER / 'src'),
+                        help='Folder of the modules to benchmark (such as the src folder of an '
+                             'older checkout)')
+    parser.add_argument('--repeat',
+                        type=int, default=3,
+                        help='Number of timed runs (the fastest run is reported)')
+    return parser
+
+def use_source(folder:str):
+    """Import the modules to benchmark from the folder"""
+    sys.path.insert(0, str(Path(folder).resolve()))
+
+def get_best_time(function, repeat:int, setup=None) -> float:
+    """Get the fastest time (seconds) of several calls of the function
+
+    The setup (if any) is not timed, and its result is passed to the function."""
+    best = float('inf')
+    for _ in range(max(repeat, 1)):
+        args = (setup(),) if setup else ()
+        started = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def get_analysis_time(filename:str, config:dict, repeat:int) -> float:
+    """Get the fastest time (seconds) of analyzing a log file (without the report)
+
+    The log file is read and the steps are compiled again before each run."""
+    # pylint: disable=import-outside-toplevel; The modules are imported from the selected folder
+    # pylint: disable=protected-access; The analysis is timed without the report
+    import analyze
+    return get_best_time(lambda setup: analyze._analyze_records(*setup), repeat,
+                         lambda: (read_records(filename), analyze._define_steps(config)))
+
+def read_records(filename:str):
+    """Read a log file into a record table (or a record list in versions without tables)"""
+    # pylint: disable=import-outside-toplevel; The modules are imported from the selected folder
+    from logfile import LogFile
+    read = getattr(LogFile, 'read_table', None) or getattr(LogFile, 'read')
+    return read(filename)
+
+def write_log(filename:str, records):
+    """Write (start, active, hwnd, title, app) records as a log file (hwnd -1 is no window)"""
+    with open(filename, 'w', encoding=getpreferredencoding(False)) as fout:
+        fout.write(f'\n{_HEADER_TEXT}\n')
+        for start, active, hwnd, title, app in records:
+            fout.write(f'{start:%Y-%m-%d %H:%M:%S}\t{"active" if active else "inactive"}\t'
+                       f'{_NO_HWND if hwnd == -1 else f"{hwnd:08X}"}\t{title}\t{app}\n')
@@ -14,6 +14,10 @@ HEADER_TEXT = 'Time\tUser_Active\tWindow_Handle\tTitle\tApplication'
 class Record():
     """A record found in the activity log."""
 
+    # pylint: disable=too-many-instance-attributes; The fields derived from the start are cached
+    __slots__ = ('_start', '_day', '_weekday', '_time_of_day',
+                 'active', 'hwnd', 'title', 'app', 'seconds', 'activity')
+
     def __init__(self, active:bool=False, hwnd:int=_INVALID_HANDLE, title:str='', app:str=''):
         self.start : datetime = datetime.now()
         self.active : bool = active
@@ -36,11 +40,29 @@ class Record():
         else:
             return _INACTIVE
 
+    @property
+    def day(self) -> int:
+        """Get the calendar day (date ordinal) that the record started"""
+        return self._day
+
     @property
     def hwnd_is_valid(self):
         """Returns True if the activity's window handle is valid"""
         return self.hwnd != _INVALID_HANDLE
 
+    @property
+    def start(self) -> datetime:
+        """Get the time that the record started"""
+        return self._start
+
+    @start.setter
+    def start(self, value:datetime):
+        """Set the start time (and the day, weekday and time of day derived from it)"""
+        self._start = value
+        self._day = value.toordinal()
+        self._weekday = (self._day + 6) % 7
+        self._time_of_day = 3600 * value.hour + 60 * value.minute + value.second
+
     @property
     def stop(self):
         """Use the duration to get the activity stop time"""
@@ -52,9 +74,17 @@ class Record():
         self.seconds = (value - self.start).total_seconds()
 
     @property
-    def time_of_day(self):
-        """Get the time of day that the record started"""
-        return self.start.time()
+    def time_of_day(self) -> int:
+        """Get the time of day (seconds after midnight) that the record started"""
+        return self._time_of_day
+
+    @property
+    def weekday(self) -> int:
+        """Get the index for the weekday that the record started
+
+        0 (Monday) through 6 (Sunday)
+        """
+        return self._weekday
 
     def raw_text(self) -> str:
         """Get a string with the raw input values and no processed data"""
@@ -0,0 +1,50 @@
+"""Interface of the sources of user activity sampled by the tracker"""
+
+from datetime import datetime
+from threading import Event
+from typing import Protocol
+
+class ActivitySource(Protocol):
+    """Source of the user activity sampled by the tracker
+
+    WindowsActivity reads the activity of the Windows desktop. FakeActivity
+    simulates a user and ReplayActivity replays a log file, so the tracker
+    can also run on other platforms. The sources that sample in real time
+    get their clock from SystemClock."""
+
+    def get_active_window_handle(self) -> int:
+        """Get the handle (HWND) of the active window"""
+
+    def get_app_path(self, hwnd) -> str:
+        """Get the path to the application that owns the window handle"""
+
+    def get_keypress(self) -> str:
+        """Get a keypress (if any)"""
+
+    def get_uptime_ms(self) -> int:
+        """Get the time (ms) that the machine has been running"""
+
+    def get_user_input_ms(self) -> int:
+        """Get the machine uptime (ms) associated with the last user input"""
+
+    def get_window_title(self, hwnd) -> str:
+        """Get the window title based on the window handle"""
+
+    def now(self) -> datetime:
+        """Get the current local date and time"""
+
+    def sleep(self, seconds:float, stop:Event):
+        """Wait until the next sample (or until the stop event is set)"""
+
+class SystemClock():
+    """Clock of the sources that sample the user activity in real time"""
+
+    @staticmethod
+    def now() -> datetime:
+        """Get the current local date and time"""
+        return datetime.now()
+
+    @staticmethod
+    def sleep(seconds:float, stop:Event):
+        """Wait until the next sample (or until the stop event is set)"""
+        stop.wait(seconds)
@@ -1,7 +1,13 @@
 """Routines to analyze the user activity data"""
 
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from hashlib import sha1
 from locale import getpreferredencoding
+from multiprocessing import freeze_support
+from os import replace
 from pathlib import Path
 import sys
 import json
@@ -9,10 +15,13 @@ import json
 from logfile import LogFile
 from project import Project
 from record import Record
+from record_table import RecordTable
 from report import Report
 from step import Step
 
+_CHECKPOINT_VERSION = 1
 _CONFIG_FILE = 'analysis.json'
+_DATE_FORMAT = '%Y-%m-%d'
 _LOG_FOLDER = '.'
 _SECONDS_PER_HOUR = 3600
 
@@ -26,6 +35,19 @@ def parse_arguments():
     parser.add_argument('-f', '--folder',
                         type=str, default=_LOG_FOLDER,
                         help='Folder path for log files')
+    parser.add_argument('--from',
+                        type=get_date, dest='first_day', metavar='DATE',
+                        help='First day (YYYY-MM-DD) of a date range to analyze')
+    parser.add_argument('--to',
+                        type=get_date, dest='last_day', metavar='DATE',
+                        help='Last day (YYYY-MM-DD) of a date range to analyze')
+    parser.add_argument('-s', '--stream',
+                        action='store_true',
+                        help='Analyze the log file one day at a time (uses less memory)')
+    parser.add_argument('--team',
+                        action='store_true',
+                        help='Report the log files of every user in the folder tree'
+                            ' (the most recent week unless a date range is given)')
     parser.add_argument('-t', '--tagged',
                         action='store_true',
                         help='Show tagged records')
@@ -38,40 +60,50 @@ def parse_arguments():
                             ' Set to number to auto-select from list')
     return parser.parse_args()
 
+def get_date(text:str) -> datetime:
+    """Get the date of a date option (YYYY-MM-DD)"""
+    try:
+        return datetime.strptime(text, _DATE_FORMAT)
+    except ValueError as error:
+        raise ArgumentTypeError(f'invalid date "{text}" (use YYYY-MM-DD)') from error
+
 def main():
     """Analyze the user's activity log"""
     args = parse_arguments()
 
     # Load the analysis configuration settings
     config = _read_config(args.config)
+    steps = _define_steps(config)
 
-    # Get the logfile to analyze
-    try:
-        filename = LogFile.select(args.folder, selected=int(args.logfile))
-    except (ValueError, TypeError):
-        filename = args.logfile or LogFile.select(args.folder)
-    if not filename:
-        folder = Path(args.folder).absolute()
-        sys.exit(f'\nERROR: No log files found in "{folder}"')
-
-    records:list[Record] = LogFile.read(filename)
-    if not records:
-        filename = Path(filename).absolute()
-        sys.exit(f'\nERROR: "{filename}" contains no time records')
-    _analyze_records(records, config)
+    # Get the logfiles to analyze (for each user of a team)
+    logfiles = _get_logfiles(args)
+    filenames = [filename for user_files in logfiles.values() for filename in user_files]
+    results = iter(_analyze_logfiles(filenames, steps, config, args))
+    team = {user: _merge_results([next(results) for _ in user_files], config, args)
+            for user, user_files in logfiles.items()}
+    for user_projects, _ in team.values():
+        _distribute_times(user_projects.values())
+    projects, summary = _merge_results(team.values(), config, args)
+    if not summary.first_day:
+        if len(filenames) == 1:
+            filename = Path(filenames[0]).absolute()
+            sys.exit(f'\nERROR: "{filename}" contains no time records')
+        sys.exit('\nERROR: The log files contain no time records in the date range')
 
-    projects = _define_projects(config)
-    untagged_projects = [prj.name for prj in projects.values()
-                         if prj.distribute]
     if args.tagged:
-        _print_records('Tagged Records', (rec for rec in records
-                       if rec.activity not in untagged_projects))
+        _print_records('Tagged Records', summary.tagged)
     if args.untagged:
-        _print_records('Untagged Records', (rec for rec in records
-                       if rec.activity in untagged_projects))
+        _print_records('Untagged Records', summary.untagged)
 
-    _group_records_as_projects(records, projects)
-    _distribute_times(projects.values())
+    # Dates are only shown when a single week is reported
+    single_week = len(filenames) == 1 or args.team and not (args.first_day or args.last_day)
+    first_day = summary.first_day if single_week else None
+
+    # Print the time card of each user of a team
+    if args.team:
+        for user, (user_projects, _) in team.items():
+            Report.print_time_card(_get_working_projects(user_projects),
+                                   f'Projects ({user})', first_day)
 
     # Print information about non-working and unidentified hours
     nonwork = [prj
@@ -79,22 +111,259 @@ def main():
                if not prj.working or prj.distribute and prj.total_hours]
     Report.print_time_card(nonwork, 'Additional Information', group_rows=2)
 
-    _print_summary_data(records, projects.values())
+    _print_summary_data(summary, projects.values())
 
     # Print time card
-    working = [prj
-               for prj in projects.values()
-               if prj.working and not prj.distribute and prj.total_hours]
-    Report.print_time_card(working, 'Projects', records[0].start)
+    Report.print_time_card(_get_working_projects(projects), 'Projects', first_day)
 
     input('\nPress ENTER to quit\n')
 
-def _analyze_records(records:list[Record], cfg:dict):
-    step = Step()
-    for step_config in cfg['steps']:
-        step.apply(step_config, records)
+class LiveAnalysis():
+    """Running analysis of the records of the current week (used by the tracker)
+
+    The steps never combine the records of different days, so each day is
+    analyzed once when the next day starts and its totals are kept. A new
+    record is only appended to the table of the current day, which is
+    analyzed when a time card is requested."""
+    def __init__(self, config:dict):
+        self.config = config
+        self.steps = _define_steps(config)
+        self.projects = _define_projects(config)    # totals of the previous days
+        self.records = RecordTable()                # records of the current day
+
+    @staticmethod
+    def from_config_file(configfile:str) -> 'LiveAnalysis':
+        """Create a live analysis from a configuration file (exit on errors)"""
+        return LiveAnalysis(_read_config(configfile))
+
+    def add_record(self, record:Record):
+        """Add a new record (the previous days of the week are already analyzed)"""
+        day = record.day
+        if self.records and self.records.day[-1] != day:
+            week = self.records.day[-1] - self.records.weekday[-1]
+            self._close_day()
+            if day - record.weekday != week:
+                self.projects = _define_projects(self.config)
+        self.records.append(record.start, record.active, record.hwnd, record.title, record.app)
+
+    def add_table(self, records:RecordTable):
+        """Add earlier records of the week (such as the current log file)"""
+        if not records:
+            return
+        last_day = records.find_last_day()
+        self.records = records.copy(0, last_day)
+        self._close_day()
+        self.records = records.copy(last_day)
+
+    def print_time_card(self, now:datetime=None):
+        """Print the time card of the week (including the current day so far)"""
+        projects = _define_projects(self.config)
+        for name, project in projects.items():
+            project.add_project(self.projects[name])
+        now = now or datetime.now()
+        records = self.records.copy()
+        if records:
+            # The current record lasts until now
+            records.set_durations()
+            last = len(records) - 1
+            if records.day[last] == now.toordinal():
+                records.seconds[last] = (now - records.start_time(last)).total_seconds()
+            _analyze_records(records, self.steps)
+            _group_records_as_projects(records, projects)
+        _distribute_times(projects.values())
+        Report.print_time_card(_get_working_projects(projects), 'Projects', now)
+
+    def _close_day(self):
+        """Analyze the records of the current day and add them to the totals"""
+        self.records.set_durations()
+        _analyze_records(self.records, self.steps)
+        _group_records_as_projects(self.records, self.projects)
+        self.records = RecordTable()
+
+class _Summary():
+    """Record totals that are folded in as each table of records is analyzed"""
+    def __init__(self, projects:dict[str,Project], *, tagged=False, untagged=False):
+        self.first_day:datetime = None
+        self.active_seconds = 0.0
+        self.inactive_seconds = 0.0
+        self.tagged:list[Record] = [] if tagged else None
+        self.untagged:list[Record] = [] if untagged else None
+        self._untagged_projects = [prj.name for prj in projects.values()
+                                   if prj.distribute]
+
+    def add(self, records:RecordTable):
+        """Add the totals of a table of analyzed records"""
+        if not records:
+            return
+        if not self.first_day:
+            self.first_day = records.start_time(0)
+        for active, seconds in zip(records.active, records.seconds):
+            if active:
+                self.active_seconds += seconds
+            else:
+                self.inactive_seconds += seconds
+        if self.tagged is None and self.untagged is None:
+            return
+        for record in records.records():
+            if record.activity in self._untagged_projects:
+                if self.untagged is not None:
+                    self.untagged.append(record)
+            elif self.tagged is not None:
+                self.tagged.append(record)
+
+    def get_state(self) -> dict:
+        """Get the record totals (to save them)"""
+        first_day = self.first_day.isoformat() if self.first_day else None
+        return {'first_day': first_day,
+                'active_seconds': self.active_seconds,
+                'inactive_seconds': self.inactive_seconds}
+
+    def set_state(self, state:dict):
+        """Restore the record totals from get_state()"""
+        first_day = state['first_day']
+        self.first_day = datetime.fromisoformat(first_day) if first_day else None
+        self.active_seconds = float(state['active_seconds'])
+        self.inactive_seconds = float(state['inactive_seconds'])
+
+    def add_summary(self, other:'_Summary'):
+        """Add the totals of a later summary (such as the next week)"""
+        self.first_day = self.first_day or other.first_day
+        self.active_seconds += other.active_seconds
+        self.inactive_seconds += other.inactive_seconds
+        if self.tagged is not None:
+            self.tagged.extend(other.tagged)
+        if self.untagged is not None:
+            self.untagged.extend(other.untagged)
+
+def _analyze_logfile(filename:str, steps:list[Step], config:dict,
+                     args) -> tuple[dict[str,Project], _Summary]:
+    """Analyze a single log file (in a worker process when there are several)"""
+    if not (args.stream or args.tagged or args.untagged or args.first_day or args.last_day or
+            LogFile.is_binary(filename)):
+        return _analyze_new_records(filename, steps, config)
+    if args.stream:
+        totals = _analyze_tables(LogFile.read_days(filename), steps, config, args)
+        if totals:
+            return totals
+    return _analyze_tables([LogFile.read_table(filename)], steps, config, args)
+
+def _analyze_tables(tables, steps:list[Step], config:dict,
+                    args) -> tuple[dict[str,Project], _Summary]:
+    """Analyze the tables of a log file (None if a day comes back after another day)
+
+    The steps only take consecutive records of the same day as a day, so a
+    log file whose days come back (such as concatenated log files) is only
+    analyzed like the whole log file when it is read at once."""
+    projects = _define_projects(config)
+    summary = _Summary(projects, tagged=args.tagged, untagged=args.untagged)
+    days = set()
+    for records in tables:
+        day = records.day[0] if records else None
+        if day in days:
+            return None
+        days.add(day)
+        _select_days(records, args.first_day, args.last_day)
+        _add_records(records, steps, projects, summary)
+    return projects, summary
+
+def _analyze_new_records(filename:str, steps:list[Step],
+                         config:dict) -> tuple[dict[str,Project], _Summary]:
+    """Analyze the records of a log file that are not in its checkpoint yet
+
+    The checkpoint (*.tabs) holds the totals of the days before the last day
+    of the log file. Only the records of the last day and any records that
+    were appended since the checkpoint are analyzed."""
+    config_key = sha1(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+    offset, digest, projects, summary = _read_checkpoint(filename, config, config_key)
+    records, next_offset, next_digest = LogFile.read_tail(filename, offset, digest)
+    if records is None:
+        offset, digest, projects, summary = 0, b'', *_define_totals(config)
+        records, next_offset, next_digest = LogFile.read_tail(filename)
+
+    # A day that comes back (such as in concatenated log files) is only
+    # analyzed with the rest of its records when the log file is analyzed at once
+    if not records.days_ascend():
+        projects, summary = _define_totals(config)
+        _add_records(LogFile.read_table(filename), steps, projects, summary)
+        return projects, summary
+
+    # Days before the last day are complete, so their totals are saved
+    last_day = records.find_last_day()
+    if last_day or next_offset != offset:
+        _add_records(records.copy(0, last_day), steps, projects, summary)
+        _write_checkpoint(filename, config_key, next_offset, next_digest, projects, summary)
+    _add_records(records.copy(last_day), steps, projects, summary)
+    return projects, summary
+
+def _analyze_logfiles(filenames:list[str], steps:list[Step], config:dict,
+                      args) -> list[tuple[dict[str,Project], _Summary]]:
+    """Analyze the log files (each one in a worker process if there are several)
+
+    The compiled steps are sent to the worker processes, so the configuration
+    is only compiled once."""
+    analyze_logfile = partial(_analyze_logfile, steps=steps, config=config, args=args)
+    if len(filenames) == 1:
+        return [analyze_logfile(filenames[0])]
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(analyze_logfile, filenames))
+
+def _add_records(records:RecordTable, steps:list[Step],
+                 projects:dict[str,Project], summary:_Summary):
+    """Analyze the records and add their totals to the projects and summary"""
+    _analyze_records(records, steps)
+    _group_records_as_projects(records, projects)
+    summary.add(records)
+
+def _analyze_records(records:RecordTable, steps:list[Step]):
+    for step in steps:
+        step.apply(records)
+
+def _define_totals(config:dict) -> tuple[dict[str,Project], _Summary]:
+    projects = _define_projects(config)
+    return projects, _Summary(projects)
+
+def _get_checkpoint_filename(filename:str) -> str:
+    return f'{filename}s'
 
-def _print_records(title:str, records:list[Record]):
+def _get_logfiles(args) -> dict[str,list[str]]:
+    """Get the log files selected by the user for each user (or exit if there are none)
+
+    The user is blank unless the log files of a team are selected."""
+    folder = Path(args.folder).absolute()
+    if args.team:
+        team = LogFile.find_team(args.folder, args.first_day, args.last_day)
+        if not team:
+            sys.exit(f'\nERROR: No log files found in "{folder}" for the team')
+        return team
+    if args.first_day or args.last_day:
+        filenames = LogFile.find_range(args.folder, args.first_day, args.last_day)
+        if not filenames:
+            sys.exit(f'\nERROR: No log files found in "{folder}" for the date range')
+        return {'': filenames}
+    try:
+        filename = LogFile.select(args.folder, selected=int(args.logfile))
+    except (ValueError, TypeError):
+        filename = args.logfile or LogFile.select(args.folder)
+    if not filename:
+        sys.exit(f'\nERROR: No log files found in "{folder}"')
+    return {'': [filename]}
+
+def _get_working_projects(projects:dict[str,Project]) -> list[Project]:
+    return [prj
+            for prj in projects.values()
+            if prj.working and not prj.distribute and prj.total_hours]
+
+def _merge_results(results, config:dict, args) -> tuple[dict[str,Project], _Summary]:
+    """Merge the project and record totals of several analyses (such as weeks)"""
+    projects = _define_projects(config)
+    summary = _Summary(projects, tagged=args.tagged, untagged=args.untagged)
+    for other_projects, other_summary in results:
+        for name, project in other_projects.items():
+            projects[name].add_project(project)
+        summary.add_summary(other_summary)
+    return projects, summary
+
+def _print_records(title:str, records):
     print(f'\n {title}:')
     print('=' * 80)
     for record in sorted(records, key=lambda rec: -rec.seconds):
@@ -107,13 +376,23 @@ def _define_projects(cfg:dict) -> dict[str,Project]:
         projects[project_name] = Project(project)
     return projects
 
-def _group_records_as_projects(records:list[Record], projects:dict[str,Project]):
+def _define_steps(cfg:dict) -> list[Step]:
+    """Compile the analysis steps from the configuration (exit on errors)"""
+    try:
+        steps = [Step(step_config) for step_config in cfg['steps']]
+    except ValueError as error:
+        sys.exit(f'\nERROR: Invalid configuration: {error}')
+    Step.share_literal_filter(steps)
+    return steps
+
+def _group_records_as_projects(records:RecordTable, projects:dict[str,Project]):
     """Apply record weekday times to projects"""
-    for record in records:
-        if not record.activity or record.activity not in projects:
+    for index, activity_id in enumerate(records.activity):
+        activity = records.strings[activity_id]
+        if not activity or activity not in projects:
             continue
-        prj = projects[record.activity]
-        prj.add_record(record)
+        prj = projects[activity]
+        prj.add_row(records, index)
 
 def _distribute_times(projects:list[Project]):
     """Distribute times from unidentified active hours to main projects"""
@@ -131,6 +410,52 @@ def _distribute_times(projects:list[Project]):
                 dst.distribute_seconds(src, 1 / len(dst_projects))
         distributed_seconds += src.total_seconds
 
+def _write_checkpoint(filename:str, config_key:str, offset:int, digest:bytes,
+                      projects:dict[str,Project], summary:_Summary):
+    """Save the totals of the log file before the offset (if possible)"""
+    # pylint: disable=too-many-arguments; One argument per checkpoint field
+    checkpoint = {
+        'version': _CHECKPOINT_VERSION,
+        'config': config_key,
+        'offset': offset,
+        'digest': digest.hex(),
+        'projects': {name: project.get_state() for name, project in projects.items()},
+        'summary': summary.get_state(),
+    }
+    checkpoint_file = _get_checkpoint_filename(filename)
+    try:
+        with open(f'{checkpoint_file}.tmp', 'w', encoding='utf-8') as fout:
+            json.dump(checkpoint, fout)
+        replace(f'{checkpoint_file}.tmp', checkpoint_file)
+    except OSError:
+        pass
+
+def _select_days(records:RecordTable, first_day:datetime, last_day:datetime):
+    """Keep only the records of the days in the date range"""
+    if not first_day and not last_day:
+        return
+    first = first_day.toordinal() if first_day else 0
+    last = last_day.toordinal() if last_day else sys.maxsize
+    rows = [index for index, day in enumerate(records.day) if first <= day <= last]
+    if len(rows) < len(records):
+        records.keep(rows)
+
+def _read_checkpoint(filename:str, config:dict,
+                     config_key:str) -> tuple[int, bytes, dict[str,Project], _Summary]:
+    """Get the log file offset and hash and the totals saved in a checkpoint"""
+    projects, summary = _define_totals(config)
+    try:
+        with open(_get_checkpoint_filename(filename), encoding='utf-8') as fin:
+            checkpoint = json.load(fin)
+        if checkpoint['version'] != _CHECKPOINT_VERSION or checkpoint['config'] != config_key:
+            return 0, b'', projects, summary
+        for name, project in projects.items():
+            project.set_state(checkpoint['projects'][name])
+        summary.set_state(checkpoint['summary'])
+        return int(checkpoint['offset']), bytes.fromhex(checkpoint['digest']), projects, summary
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0, b'', *_define_totals(config)
+
 def _read_config(configfile:str) -> dict:
     encoding = getpreferredencoding(do_setlocale=False)
     try:
@@ -146,17 +471,12 @@ def _read_config(configfile:str) -> dict:
         print(' ' * (error.colno - 1) + '^')
         sys.exit(f'\nERROR: "{configfile}" (line {error.lineno}): {str(error.msg)}')
 
-def _print_summary_data(records:list[Record], projects:list[Project]):
+def _print_summary_data(summary:_Summary, projects:list[Project]):
     """Print summary data about the week's time log"""
     # Tally record sub-totals
     lines = []
-    active_seconds = 0
-    inactive_seconds = 0
-    for record in records:
-        if record.active:
-            active_seconds += record.seconds
-        else:
-            inactive_seconds += record.seconds
+    active_seconds = summary.active_seconds
+    inactive_seconds = summary.inactive_seconds
     record_seconds = active_seconds + inactive_seconds
     hours = record_seconds / _SECONDS_PER_HOUR
     lines.append(f'         Total Recorded Time ={hours:5.1f} hours')
@@ -193,4 +513,5 @@ def _print_summary_data(records:list[Record], projects:list[Project]):
 
 
 if __name__ == '__main__':
+    freeze_support()    # worker processes of the frozen executable
     main()
@@ -0,0 +1,129 @@
+"""Compact binary format of the activity logs (*.tabb)"""
+
+from array import array
+from itertools import accumulate, islice, repeat
+from operator import add, floordiv, mod, sub
+import struct
+import sys
+
+from record_table import RecordTable
+
+_BLOCK_HEADER = struct.Struct('<IIIq4s')    # records, new strings, strings size, start, typecodes
+_FILE_HEADER = struct.Struct('<4sH')        # magic, version
+_MAGIC = b'TABB'
+_SECONDS_PER_DAY = 86400
+_SIGNED_TYPECODES = 'bhiq'
+_VERSION = 1
+
+# The active flags of each bitmap byte as one byte per flag
+_BITMAP_FLAGS = tuple(bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256))
+
+class BinaryLog():
+    """Read and write activity logs in a compact binary format
+
+    A binary log holds blocks of records stored as columns: the start times
+    as differences from the previous record, the active flags as a bitmap,
+    and the window handles, titles and apps in the smallest integer type that
+    fits. Titles and apps are ids into a string dictionary of the file, and
+    each block adds the strings that its records use for the first time.
+    The columns are decoded without a Python loop over the records."""
+
+    @staticmethod
+    def read(filename:str) -> RecordTable:
+        """Read the records of a binary log into a table (without durations)
+
+        Raises ValueError if the file is not a valid binary log."""
+        table = RecordTable()
+        with open(filename, 'rb') as fin:
+            try:
+                magic, version = _FILE_HEADER.unpack(fin.read(_FILE_HEADER.size))
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError(f'"{filename}" is not a binary log file')
+                while header := fin.read(_BLOCK_HEADER.size):
+                    _read_block(fin, _BLOCK_HEADER.unpack(header), table)
+            except (struct.error, EOFError, UnicodeDecodeError) as error:
+                raise ValueError(f'Invalid binary log file "{filename}"') from error
+        return table
+
+    @staticmethod
+    def write(filename:str, table:RecordTable):
+        """Write the records of a table to a binary log (replacing the file)"""
+        with open(filename, 'wb') as fout:
+            fout.write(_FILE_HEADER.pack(_MAGIC, _VERSION))
+            if table:
+                _write_block(fout, table)
+
+def _get_typecode(column) -> str:
+    """Get the smallest signed array type that holds every value of the column"""
+    low, high = min(column), max(column)
+    for typecode in _SIGNED_TYPECODES:
+        limit = 1 << (8 * array(typecode).itemsize - 1)
+        if -limit <= low and high < limit:
+            return typecode
+    raise ValueError('Column value out of range')
+
+def _check_string_ids(column:array, table:RecordTable):
+    """Raise ValueError if a string id of the column is not in the strings of the table"""
+    if column and not 0 <= min(column) <= max(column) < len(table.strings):
+        raise ValueError('Invalid string id')
+
+def _read_block(fin, header:tuple, table:RecordTable):
+    """Add the records of a block to the table"""
+    count, string_count, strings_size, first_start, typecodes = header
+    _read_strings(fin, string_count, strings_size, table)
+    bitmap = fin.read((count + 7) // 8)
+    deltas, hwnd, title, app = (_read_column(fin, typecode, count)
+                                for typecode in typecodes.decode('ascii'))
+    _check_string_ids(title, table)
+    _check_string_ids(app, table)
+    start = array('q', islice(accumulate(deltas, initial=first_start), 1, None))
+    day = array('i', map(floordiv, start, repeat(_SECONDS_PER_DAY)))
+    table.start.extend(start)
+    table.seconds.extend(repeat(0.0, count))
+    table.active.frombytes(b''.join(map(_BITMAP_FLAGS.__getitem__, bitmap))[:count])
+    table.hwnd.extend(iter(hwnd))
+    table.title.extend(iter(title))
+    table.app.extend(iter(app))
+    table.activity.extend(repeat(0, count))
+    table.day.extend(day)
+    table.weekday.extend(map(mod, map(add, day, repeat(6)), repeat(7)))
+
+def _read_column(fin, typecode:str, count:int) -> array:
+    column = array(typecode)
+    column.fromfile(fin, count)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+def _read_strings(fin, count:int, size:int, table:RecordTable):
+    """Add the new strings of a block to the strings of the table"""
+    strings = fin.read(size).decode('utf-8').split('\n') if count else []
+    if len(strings) != count:
+        raise ValueError('Invalid string dictionary')
+    for string in strings:
+        table.intern(string)
+
+def _write_block(fout, table:RecordTable):
+    """Write all the records of the table as a single block"""
+    count = len(table)
+    strings = table.strings
+    string_ids = {'': 0}
+    title = [string_ids.setdefault(strings[index], len(string_ids)) for index in table.title]
+    app = [string_ids.setdefault(strings[index], len(string_ids)) for index in table.app]
+    new_strings = '\n'.join(islice(string_ids, 1, None)).encode('utf-8')
+    start = table.start
+    deltas = [0, *map(sub, islice(start, 1, None), start)]
+    active = table.active
+    bitmap = bytes(sum(flag << bit for bit, flag in enumerate(active[index:index + 8]))
+                   for index in range(0, count, 8))
+    columns = [array(_get_typecode(column), column)
+               for column in (deltas, table.hwnd, title, app)]
+    typecodes = ''.join(column.typecode for column in columns).encode('ascii')
+    fout.write(_BLOCK_HEADER.pack(count, len(string_ids) - 1, len(new_strings),
+                                  start[0], typecodes))
+    fout.write(new_strings)
+    fout.write(bitmap)
+    for column in columns:
+        if sys.byteorder == 'big':
+            column.byteswap()
+        column.tofile(fout)
@@ -0,0 +1,58 @@
+"""Convert activity log files between the text (*.tab) and binary (*.tabb) formats"""
+
+from argparse import ArgumentParser
+from glob import glob
+from locale import getpreferredencoding
+from pathlib import Path
+
+from binary_log import BinaryLog
+from logfile import LogFile
+from record import Record
+from record_table import RecordTable
+
+def parse_arguments():
+    """Get the log files selected by the user"""
+    parser = ArgumentParser()
+    parser.description = """Convert text log files (*.tab) to binary log files (*.tabb)
+                            and binary log files back to text log files"""
+    parser.add_argument('files',
+                        nargs='+',
+                        help='Log files to convert (wildcards are allowed)')
+    return parser.parse_args()
+
+def main():
+    """Convert every selected log file to the other format (next to it)"""
+    args = parse_arguments()
+    for pattern in args.files:
+        for file in sorted(glob(pattern)):
+            if LogFile.is_binary(file):
+                target = file[:-1]
+            elif file.endswith('.tab'):
+                target = f'{file}b'
+            else:
+                print(f'Cannot determine the format of file "{file}" -- Skipped')
+                continue
+            if Path(target).exists():
+                print(f'File "{target}" already exists -- Skipped')
+                continue
+            try:
+                records = LogFile.read_table(file)
+            except ValueError as error:
+                print(f'{error} -- Skipped')
+                continue
+            if LogFile.is_binary(file):
+                _write_text(target, records)
+            else:
+                BinaryLog.write(target, records)
+            print(f'Converted "{file}" to "{target}"')
+
+def _write_text(filename:str, records:RecordTable):
+    """Write the records to a text log file (with a header like the tracker)"""
+    encoding = getpreferredencoding(do_setlocale=False)
+    with open(filename, 'wt', encoding=encoding) as fout:
+        fout.write(f'\n{Record.header_text()}\n')
+        for record in records.records():
+            fout.write(f'{record.raw_text()}\n')
+
+if __name__ == '__main__':
+    main()
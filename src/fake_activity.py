@@ -0,0 +1,59 @@
+"""Simulated user activity with the same interface as WindowsActivity"""
+
+import random
+import time
+
+from activity_source import SystemClock
+
+_INPUT_CHANCE = 0.5         # chance of new user input at each sample
+_SWITCH_CHANCE = 0.05       # chance of switching to another window at each sample
+_WINDOWS = (
+    ('Inbox - Outlook', 'C:/Program Files/Microsoft Office/OUTLOOK.EXE'),
+    ('main.py - Visual Studio Code', 'C:/Program Files/Microsoft VS Code/Code.exe'),
+    ('Team meeting - Google Chrome', 'C:/Program Files/Google/Chrome/chrome.exe'),
+    ('Untitled - Notepad', 'C:/Windows/notepad.exe'),
+)
+
+class FakeActivity(SystemClock):
+    """Utilities to simulate user activity on any platform
+
+    The simulated user switches between a few windows and stops using the
+    keyboard and mouse from time to time. Only the standard library is used,
+    so the tracker loop can run (and be benchmarked) without Windows."""
+
+    def __init__(self, seed:int=None):
+        self._random = random.Random(seed)
+        self._start = time.monotonic()
+        self._hwnd = 1
+        self._input_ms = 0
+
+    def get_active_window_handle(self) -> int:
+        """Get the handle of the simulated active window"""
+        if self._random.random() < _SWITCH_CHANCE:
+            self._hwnd = self._random.randrange(len(_WINDOWS)) + 1
+        return self._hwnd
+
+    @staticmethod
+    def get_app_path(hwnd) -> str:
+        """Get the path to the application that owns the simulated window"""
+        return _WINDOWS[hwnd - 1][1]
+
+    @staticmethod
+    def get_keypress() -> str:
+        """Get a keypress (the simulated user never presses a key)"""
+        return ''
+
+    def get_uptime_ms(self) -> int:
+        """Get the time (ms) since the simulation started"""
+        return int(1000 * (time.monotonic() - self._start))
+
+    def get_user_input_ms(self) -> int:
+        """Get the simulated uptime (ms) associated with the last user input"""
+        if self._random.random() < _INPUT_CHANCE:
+            self._input_ms = self.get_uptime_ms()
+        return self._input_ms
+
+    @staticmethod
+    def get_window_title(hwnd) -> str:
+        """Get the title of the simulated window"""
+        return _WINDOWS[hwnd - 1][0]
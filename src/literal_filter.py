@@ -0,0 +1,109 @@
+"""Literal prefilter that finds the strings that a regular expression could match"""
+
+import re
+try:
+    from re import _parser
+except ImportError:                 # Python 3.10
+    # pylint: disable=deprecated-module; The parser moved in Python 3.11
+    import sre_parse as _parser
+
+from string_memo import StringMemo
+# pylint: disable=no-member; The parser constants are only defined when the module is imported
+
+# Characters that IGNORECASE patterns match with ASCII letters (but lower() does not map to them)
+_CASE_FOLDS = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})
+_MIN_LITERAL_LENGTH = 3     # shorter literals would let almost every string through
+_REPEATS = (_parser.MAX_REPEAT, _parser.MIN_REPEAT, getattr(_parser, 'POSSESSIVE_REPEAT', None))
+
+class LiteralFilter():
+    """Find which of many literals are in a string with a single scan
+
+    The literals are merged into one regular expression shaped like a trie,
+    which finds the longest literal that starts at each position of the
+    (case-folded) string. The shorter literals that start at the same
+    position are its prefixes. The literals found in each distinct string
+    are kept in a string memo."""
+    # pylint: disable=too-few-public-methods; A filter only finds literals
+    def __init__(self, literals:set[str]):
+        self._prefixes = {literal: [literal[:end] for end in range(1, len(literal) + 1)
+                                    if literal[:end] in literals]
+                          for literal in literals}
+        self._pattern = re.compile(f'(?=({_get_trie_pattern(literals)}))') if literals else None
+        self._memo = StringMemo(self._find)
+
+    def find(self, strings:list[str], string_id:int) -> frozenset[str]:
+        """Get the literals that are in a string of the strings list (ignoring the case)"""
+        return self._memo.get(strings, string_id)
+
+    def _find(self, strings:list[str], string_id:int) -> frozenset[str]:
+        if not self._pattern:
+            return frozenset()
+        text = strings[string_id].translate(_CASE_FOLDS).lower()
+        return frozenset(prefix for literal in self._pattern.findall(text)
+                         for prefix in self._prefixes[literal])
+
+def get_required_literals(pattern:re.Pattern) -> frozenset[str]:
+    """Get literals (in lower case) such that every match of the pattern contains one of them
+
+    None is returned if no such literals are found."""
+    try:
+        return _get_sequence_literals(_parser.parse(pattern.pattern, pattern.flags))
+    except (re.error, TypeError):
+        return None
+
+def _get_item_literals(operator, argument) -> frozenset[str]:
+    """Get the required literals of an item of a parsed pattern"""
+    if operator == _parser.SUBPATTERN:
+        return _get_sequence_literals(argument[-1])
+    if operator == getattr(_parser, 'ATOMIC_GROUP', None):
+        return _get_sequence_literals(argument)
+    if operator == _parser.BRANCH:
+        branches = [_get_sequence_literals(branch) for branch in argument[1]]
+        if any(literals is None for literals in branches):
+            return None
+        return frozenset().union(*branches)
+    if operator in _REPEATS and argument[0] >= 1:
+        return _get_sequence_literals(argument[2])
+    return None
+
+def _get_sequence_literals(items) -> frozenset[str]:
+    """Get the most selective required literals of a sequence of parsed items
+
+    A run of literal ASCII characters is a required literal by itself, and
+    so is each alternative of a required group."""
+    candidates = []
+    run = ''
+    for operator, argument in items:
+        if operator == _parser.LITERAL and argument < 128:
+            run += chr(argument).lower()
+            continue
+        if run:
+            candidates.append(frozenset([run]))
+            run = ''
+        if literals := _get_item_literals(operator, argument):
+            candidates.append(literals)
+    if run:
+        candidates.append(frozenset([run]))
+    candidates = [literals for literals in candidates
+                  if min(map(len, literals)) >= _MIN_LITERAL_LENGTH]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda literals: (min(map(len, literals)), -len(literals)))
+
+def _get_trie_pattern(literals:set[str]) -> str:
+    """Get a pattern that matches the longest literal at a position"""
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _get_node_pattern(trie)
+
+def _get_node_pattern(node:dict) -> str:
+    branches = [re.escape(char) + _get_node_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else f'(?:{"|".join(branches)})'
+    return f'(?:{pattern})?' if '' in node else pattern
@@ -0,0 +1,191 @@
+"""Index of the log files in a folder tree for queries by day, application and title"""
+
+from datetime import date, datetime
+from os import path, stat
+import sqlite3
+
+from logfile import LogFile
+from record_table import RecordTable
+
+_DATE_FORMAT = '%Y-%m-%d'
+_INDEX_FILE = 'activity-index.sqlite'
+_INDEX_VERSION = 1
+_SCHEMA = """
+    CREATE TABLE files (
+        id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, user TEXT NOT NULL,
+        size INTEGER NOT NULL, mtime INTEGER NOT NULL);
+    CREATE TABLE segments (
+        id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL, day TEXT NOT NULL,
+        first INTEGER NOT NULL, stop INTEGER NOT NULL, records INTEGER NOT NULL,
+        active_seconds REAL NOT NULL, inactive_seconds REAL NOT NULL);
+    CREATE INDEX segments_by_day ON segments (day);
+    CREATE INDEX segments_by_file ON segments (file_id);
+    CREATE TABLE segment_apps (
+        segment_id INTEGER NOT NULL, app TEXT NOT NULL,
+        active_seconds REAL NOT NULL, inactive_seconds REAL NOT NULL);
+    CREATE INDEX segment_apps_by_app ON segment_apps (app, segment_id);
+    CREATE INDEX segment_apps_by_segment ON segment_apps (segment_id);
+    CREATE TABLE segment_titles (segment_id INTEGER NOT NULL, title TEXT NOT NULL);
+    CREATE INDEX segment_titles_by_segment ON segment_titles (segment_id);
+"""
+_SECONDS_PER_HOUR = 3600
+
+class LogIndex():
+    """SQLite index of the log files in a folder tree
+
+    A segment is a run of records of the same day in a log file. For each
+    segment, the index holds its range in the log file, the number of
+    records, the active and inactive seconds, the seconds of each application
+    and the distinct window titles (in lower case). The hours per day are
+    answered from the index alone, and the records are read only from the
+    segments that can hold matching records. A log file is indexed again
+    when its size or modification time changes."""
+
+    def __init__(self, folder:str, filename:str=''):
+        self.folder = folder
+        self._db = sqlite3.connect(filename or path.join(folder, _INDEX_FILE))
+        if self._db.execute('PRAGMA user_version').fetchone()[0] != _INDEX_VERSION:
+            with self._db:
+                for (table,) in self._db.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                    self._db.execute(f'DROP TABLE {table}')
+                self._db.executescript(_SCHEMA)
+                self._db.execute(f'PRAGMA user_version = {_INDEX_VERSION}')
+
+    def __enter__(self) -> 'LogIndex':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the index database"""
+        self._db.close()
+
+    def get_hours(self, first_day:datetime=None, last_day:datetime=None, *,
+                  app:str='', user:str=None) -> list[tuple[str,float,float]]:
+        """Get the active and inactive hours of each day in the date range
+
+        Only the hours of the application are counted if it is given. The
+        days are sorted and only the days with records are returned."""
+        conditions, parameters = _get_conditions(first_day, last_day, user)
+        totals = 'segments'
+        if app:
+            totals = 'segment_apps'
+            conditions.append('segment_apps.segment_id = segments.id AND segment_apps.app = ?')
+            parameters.append(app.lower())
+        rows = self._db.execute(
+            f'SELECT segments.day, SUM({totals}.active_seconds), SUM({totals}.inactive_seconds)'
+            f' FROM segments JOIN files ON files.id = segments.file_id'
+            f'{", segment_apps" if app else ""} WHERE {" AND ".join(conditions)}'
+            ' GROUP BY segments.day ORDER BY segments.day', parameters)
+        return [(day, active / _SECONDS_PER_HOUR, inactive / _SECONDS_PER_HOUR)
+                for day, active, inactive in rows]
+
+    def get_records(self, first_day:datetime=None, last_day:datetime=None, *,
+                    app:str='', title:str='', user:str=None) -> RecordTable:
+        """Get the records in the date range (sorted by day)
+
+        Only the records of the application and with the text in their window
+        title (ignoring the case) are returned if they are given. The records
+        keep their durations, which last until the next record of any window."""
+        app = app.lower()
+        title = title.lower()
+        conditions, parameters = _get_conditions(first_day, last_day, user)
+        if app:
+            conditions.append('EXISTS (SELECT 1 FROM segment_apps WHERE'
+                              ' segment_id = segments.id AND app = ?)')
+            parameters.append(app)
+        if title:
+            conditions.append('EXISTS (SELECT 1 FROM segment_titles WHERE'
+                              ' segment_id = segments.id AND instr(title, ?))')
+            parameters.append(title)
+        rows = self._db.execute(
+            'SELECT files.path, segments.first, segments.stop'
+            ' FROM segments JOIN files ON files.id = segments.file_id'
+            f' WHERE {" AND ".join(conditions)}'
+            ' ORDER BY segments.day, files.path, segments.first', parameters).fetchall()
+        records = RecordTable()
+        for filename, first, stop in rows:
+            segment = LogFile.read_range(path.join(self.folder, filename), first, stop)
+            strings = [string.lower() for string in segment.strings]
+            records.extend(segment, [index for index in range(len(segment))
+                                     if (not app or strings[segment.app[index]] == app)
+                                     and title in strings[segment.title[index]]])
+        return records
+
+    def update(self) -> int:
+        """Index the new and changed log files (returns the number of indexed log files)"""
+        indexed = {filename: (file_id, size, mtime) for file_id, filename, size, mtime
+                   in self._db.execute('SELECT id, path, size, mtime FROM files')}
+        found = set()
+        count = 0
+        with self._db:
+            for user, logfiles in LogFile.find_all(self.folder).items():
+                for logfile in logfiles:
+                    filename = path.relpath(logfile, self.folder)
+                    found.add(filename)
+                    file_stat = stat(logfile)
+                    known = indexed.get(filename)
+                    if known and known[1:] == (file_stat.st_size, file_stat.st_mtime_ns):
+                        continue
+                    if known:
+                        self._remove_file(known[0])
+                    self._add_file(logfile, filename, user, file_stat)
+                    count += 1
+            for filename in indexed.keys() - found:
+                self._remove_file(indexed[filename][0])
+        return count
+
+    def _add_file(self, logfile:str, filename:str, user:str, file_stat):
+        """Add the segments of a log file to the index"""
+        file_id = self._db.execute(
+            'INSERT INTO files (path, user, size, mtime) VALUES (?, ?, ?, ?)',
+            (filename, user, file_stat.st_size, file_stat.st_mtime_ns)).lastrowid
+        for first, stop, table in LogFile.read_segments(logfile):
+            app_seconds = _get_app_seconds(table)
+            active_seconds = sum(totals[0] for totals in app_seconds.values())
+            inactive_seconds = sum(totals[1] for totals in app_seconds.values())
+            segment_id = self._db.execute(
+                'INSERT INTO segments (file_id, day, first, stop, records,'
+                ' active_seconds, inactive_seconds) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (file_id, date.fromordinal(table.day[0]).strftime(_DATE_FORMAT), first, stop,
+                 len(table), active_seconds, inactive_seconds)).lastrowid
+            self._db.executemany(
+                'INSERT INTO segment_apps VALUES (?, ?, ?, ?)',
+                [(segment_id, app, *totals) for app, totals in app_seconds.items()])
+            titles = {table.strings[index].lower() for index in table.title}
+            self._db.executemany('INSERT INTO segment_titles VALUES (?, ?)',
+                                 [(segment_id, title) for title in titles])
+
+    def _remove_file(self, file_id:int):
+        """Remove a log file and its segments from the index"""
+        segments = 'SELECT id FROM segments WHERE file_id = ?'
+        self._db.execute(f'DELETE FROM segment_apps WHERE segment_id IN ({segments})', (file_id,))
+        self._db.execute(f'DELETE FROM segment_titles WHERE segment_id IN ({segments})', (file_id,))
+        self._db.execute('DELETE FROM segments WHERE file_id = ?', (file_id,))
+        self._db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+def _get_app_seconds(table:RecordTable) -> dict[str,list[float]]:
+    """Get the active and inactive seconds of each application (in lower case) of a table"""
+    app_seconds = {}
+    strings = table.strings
+    for app, active, seconds in zip(table.app, table.active, table.seconds):
+        totals = app_seconds.setdefault(strings[app].lower(), [0.0, 0.0])
+        totals[0 if active else 1] += seconds
+    return app_seconds
+
+def _get_conditions(first_day:datetime, last_day:datetime, user:str) -> tuple[list[str],list]:
+    """Get the SQL conditions (and their parameters) of the date range and the user"""
+    conditions = ['1']
+    parameters = []
+    if first_day:
+        conditions.append('segments.day >= ?')
+        parameters.append(first_day.strftime(_DATE_FORMAT))
+    if last_day:
+        conditions.append('segments.day <= ?')
+        parameters.append(last_day.strftime(_DATE_FORMAT))
+    if user is not None:
+        conditions.append('files.user = ?')
+        parameters.append(user)
+    return conditions, parameters
@@ -3,47 +3,178 @@
 from datetime import datetime, timedelta
 from locale import getpreferredencoding
 from glob import glob
-import logging
-from os import getlogin, makedirs
+from hashlib import sha1
+from mmap import mmap, ACCESS_READ
+from os import fsync, fstat, getlogin, makedirs, replace
+from pathlib import Path
 import re
+import struct
+import time
 
-from windows_activity import WindowsActivity
-from record import Record
+from binary_log import BinaryLog
+from record_table import RecordTable
 
+_BINARY_SUFFIX = '.tabb'
+_CACHE_HEADER = struct.Struct('<4sHQq20s')  # magic, version, log size, log mtime, log hash
+_CACHE_MAGIC = b'TABC'
+_CACHE_VERSION = 1
+_DATE_PREFIX = re.compile(rb'^\d{4}-\d\d-\d\d', re.MULTILINE)
 _FILE_DATE_FORMAT = '%Y-%m-%d'
+_FLUSH_SECONDS = 10.0       # longest time that a line stays in the buffer
 _LOG_FOLDER = '.'
+_MAX_BUFFERED_LINES = 100   # flush the buffer when it holds this many lines
 
 class LogFile():
     """Manage log files"""
 
     @staticmethod
-    def prepare(folder:str = _LOG_FOLDER):
-        """Configure root logging to generate activity records"""
-        makedirs(folder, exist_ok=True)         # ensure log folder exists
-        logfile = _get_current_logfile()
-        filename = f'{folder}/{logfile}'
-        logging.basicConfig(filename=filename,
-                            format='%(message)s',
-                            level=logging.INFO)
+    def find_range(folder:str, first_day:datetime=None, last_day:datetime=None) -> list[str]:
+        """Get the log files (sorted by week) with days in the date range"""
+        logfiles = _find_all_logfiles(folder)
+        return [logfiles[week] for week in sorted(logfiles)
+                if _week_in_range(week, first_day, last_day)]
+
+    @staticmethod
+    def find_all(folder:str) -> dict[str,list[str]]:
+        """Get the log files of every user in the folder tree (sorted by week)"""
+        team_logfiles = _find_team_logfiles(folder)
+        return {username: [logfiles[week] for week in sorted(logfiles)]
+                for username, logfiles in sorted(team_logfiles.items())}
+
+    @staticmethod
+    def find_team(folder:str, first_day:datetime=None,
+                  last_day:datetime=None) -> dict[str,list[str]]:
+        """Get the log files of every user in the folder tree with days in the date range
+
+        The log files of each user are sorted by week. Only the most recent
+        week is used if there is no date range."""
+        team_logfiles = _find_team_logfiles(folder)
+        if not first_day and not last_day and team_logfiles:
+            first_day = last_day = max(max(logfiles) for logfiles in team_logfiles.values())
+        team = {}
+        for username in sorted(team_logfiles):
+            logfiles = team_logfiles[username]
+            if weeks := [week for week in sorted(logfiles)
+                         if _week_in_range(week, first_day, last_day)]:
+                team[username] = [logfiles[week] for week in weeks]
+        return team
 
     @staticmethod
-    def read(filename:str) -> list:
-        """Read the activity records from the specified log file"""
+    def is_binary(filename:str) -> bool:
+        """Check if the log file is in the binary format (*.tabb)"""
+        return filename.endswith(_BINARY_SUFFIX)
+
+    @staticmethod
+    def read_days(filename:str):
+        """Generate a table with the activity records of each day in the log file
+
+        Only about one day of records is held in memory at a time, no matter
+        how large the log file is. The records are not cached. A binary log
+        file is small enough to be read at once and then split into days."""
+        if LogFile.is_binary(filename):
+            table = LogFile.read_table(filename)
+            for first, stop in _get_day_rows(table):
+                yield table.copy(first, stop)
+            return
         encoding = getpreferredencoding(do_setlocale=False)
-        records = []
-        with open(filename, 'rt', encoding=encoding) as fin:
-            prev_rec:Record = None
-            for line in fin:
-                record = Record.from_string(line)
-                if record:
-                    records.append(record)
-                    if prev_rec:
-                        if prev_rec.date == record.date:
-                            prev_rec.stop = record.start
-                        else:
-                            prev_rec.seconds = 0
-                    prev_rec = record
-        return records
+        with open(filename, 'rb') as fin:
+            if not fstat(fin.fileno()).st_size:
+                return
+            with mmap(fin.fileno(), 0, access=ACCESS_READ) as data:
+                for table in RecordTable.split_days(data, 0, len(data), encoding):
+                    table.set_durations()
+                    yield table
+
+    @staticmethod
+    def read_range(filename:str, first:int, stop:int) -> RecordTable:
+        """Read the activity records of a range found by read_segments() into a table"""
+        if LogFile.is_binary(filename):
+            return LogFile.read_table(filename).copy(first, stop)
+        encoding = getpreferredencoding(do_setlocale=False)
+        with open(filename, 'rb') as fin:
+            fin.seek(first)
+            data = fin.read(stop - first)
+        table = RecordTable()
+        table.append_bytes(data, 0, len(data), encoding)
+        table.set_durations()
+        return table
+
+    @staticmethod
+    def read_segments(filename:str):
+        """Generate the range and a table of each run of records of the same day
+
+        The range of a text log file is the byte offsets of the lines of the
+        records and the range of a binary log file is their row indexes. A
+        range can be read again (without reading the log file) with read_range()."""
+        if LogFile.is_binary(filename):
+            table = LogFile.read_table(filename)
+            for first, stop in _get_day_rows(table):
+                yield first, stop, table.copy(first, stop)
+            return
+        encoding = getpreferredencoding(do_setlocale=False)
+        with open(filename, 'rb') as fin:
+            if not fstat(fin.fileno()).st_size:
+                return
+            with mmap(fin.fileno(), 0, access=ACCESS_READ) as data:
+                for first, stop in _get_day_lines(data):
+                    table = RecordTable()
+                    table.append_bytes(data, first, stop, encoding)
+                    if table:
+                        table.set_durations()
+                        yield first, stop, table
+
+    @staticmethod
+    def read_table(filename:str) -> RecordTable:
+        """Read the activity records from the specified log file into a table
+
+        The log file is memory-mapped and parsed without decoding it first. The
+        parsed records are cached in a sidecar file (*.tabc). The cache is
+        reused while the log file is unchanged and it is extended when more
+        records are appended to the log file. A binary log file (*.tabb)
+        is read directly, since it is already stored in a compact format."""
+        if LogFile.is_binary(filename):
+            table = BinaryLog.read(filename)
+            table.set_durations()
+            return table
+        encoding = getpreferredencoding(do_setlocale=False)
+        with open(filename, 'rb') as fin:
+            file_stat = fstat(fin.fileno())
+            if not file_stat.st_size:
+                return RecordTable()
+            with mmap(fin.fileno(), 0, access=ACCESS_READ) as data:
+                table = _read_cached_table(filename, data, file_stat.st_mtime_ns, encoding)
+        table.set_durations()
+        return table
+
+    @staticmethod
+    def read_tail(filename:str, offset:int=0,
+                  digest:bytes=b'') -> tuple[RecordTable, int, bytes]:
+        """Read the activity records after an offset of the log file into a table
+
+        The digest is the hash of the log file before the offset. If that part
+        of the log file has changed, None is returned instead of a table.
+        Otherwise the offset of the lines of the last day of records (and the
+        hash of the log file before it) is also returned, so the records of
+        the last day can be read again after more records are appended."""
+        encoding = getpreferredencoding(do_setlocale=False)
+        with open(filename, 'rb') as fin:
+            file_stat = fstat(fin.fileno())
+            if file_stat.st_size < offset:
+                return None, 0, b''
+            if not file_stat.st_size:
+                return RecordTable(), 0, sha1().digest()
+            with mmap(fin.fileno(), 0, access=ACCESS_READ) as data:
+                if offset and _get_digest(data, offset) != digest:
+                    return None, 0, b''
+                if offset:
+                    table = RecordTable()
+                    table.append_bytes(data, offset, len(data), encoding)
+                else:
+                    table = _read_cached_table(filename, data, file_stat.st_mtime_ns, encoding)
+                last_day = _find_last_day(data, offset, encoding)
+                digest = _get_digest(data, last_day)
+        table.set_durations()
+        return table, last_day, digest
 
     @staticmethod
     def select(folder:str, *, selected:int=None, how_many:int=5) -> str:
@@ -58,12 +189,192 @@ class LogFile():
             selected = _get_selected_week(weeks)
         return logfiles[selected]
 
+class LogWriter():
+    """Append lines to the weekly log files through a bounded buffer
+
+    A line is written to the log file of the week of its timestamp, so the
+    writer moves to a new log file at Monday 00:00. The buffered lines are
+    written when the buffer is full, when the oldest line has been buffered
+    for flush_seconds, or when the writer is closed. So a crash of the
+    tracker loses at most the last flush_seconds of lines (as long as poll()
+    is called at least that often). With fsync, the written lines are also
+    forced to the disk, so an operating system crash or a power loss loses
+    no more than that either. A log file is only opened by its first line,
+    and the header is only added the first time that a log file is opened."""
+    # pylint: disable=too-many-instance-attributes; Buffer state is kept between writes
+    def __init__(self, folder:str=_LOG_FOLDER, header:str='', *,
+                 flush_seconds:float=_FLUSH_SECONDS, max_lines:int=_MAX_BUFFERED_LINES,
+                 sync:bool=False):
+        makedirs(folder, exist_ok=True)         # ensure log folder exists
+        self.folder = folder
+        self.header = header
+        self.flush_seconds = flush_seconds
+        self.max_lines = max_lines
+        self.sync = sync
+        self.filename = ''
+        self._file = None
+        self._week = None
+        self._lines:list[str] = []
+        self._buffered = 0.0
+        self._headed:set[str] = set()
 
-def _get_current_logfile() -> str:
-    """Get the log filename that corresponds to the current week"""
-    datestamp = datetime.now()
-    startofweek = datestamp - timedelta(days=datestamp.weekday())
-    return _get_logfile(startofweek)
+    def __enter__(self) -> 'LogWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Write the buffered lines and close the log file"""
+        if self._file:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def flush(self):
+        """Write the buffered lines to the log file"""
+        if not self._file:
+            return
+        if self._lines:
+            self._file.write(''.join(f'{line}\n' for line in self._lines))
+            self._lines.clear()
+        self._file.flush()
+        if self.sync:
+            fsync(self._file.fileno())
+
+    def get_filename(self, timestamp:datetime) -> str:
+        """Get the log file of the week of the timestamp"""
+        return f'{self.folder}/{_get_logfile(_get_start_of_week(timestamp))}'
+
+    def poll(self):
+        """Write the buffered lines if the oldest one has been buffered long enough"""
+        if self._lines and time.monotonic() - self._buffered >= self.flush_seconds:
+            self.flush()
+
+    def write(self, line:str, timestamp:datetime):
+        """Add a line to the log file of the week of its timestamp"""
+        if _get_start_of_week(timestamp) != self._week:
+            self._open_week(timestamp)
+        self._add_line(line)
+        if len(self._lines) >= self.max_lines:
+            self.flush()
+        else:
+            self.poll()
+
+    def _add_line(self, line:str):
+        if not self._lines:
+            self._buffered = time.monotonic()
+        self._lines.append(line)
+
+    def _open_week(self, timestamp:datetime):
+        """Close the current log file and open the log file of the week"""
+        self.close()
+        self._week = _get_start_of_week(timestamp)
+        self.filename = self.get_filename(timestamp)
+        encoding = getpreferredencoding(do_setlocale=False)
+        # pylint: disable=consider-using-with; The log file stays open between writes
+        self._file = open(self.filename, 'at', encoding=encoding)
+        if self.header and self.filename not in self._headed:
+            self._headed.add(self.filename)
+            self._add_line(f'\n{self.header}')
+
+
+def _get_cache_filename(filename:str) -> str:
+    return f'{filename}c'
+
+def _get_digest(data, size:int) -> bytes:
+    """Get the hash of the first bytes of the data (without copying them)"""
+    with memoryview(data) as view, view[:size] as prefix:
+        return sha1(prefix).digest()
+
+def _find_last_day(data, start:int, encoding:str) -> int:
+    """Find the offset of the lines with the records of the last day in the data
+
+    Lines are checked backwards from the end of the data until a record of
+    an earlier day is found. Lines that start with the same date as the last
+    record are not parsed again."""
+    table = RecordTable()
+    last_date = b''
+    end = len(data)
+    while end > start:
+        line_start = max(data.rfind(b'\n', start, end - 1) + 1, start)
+        if not last_date or data[line_start:line_start + len(last_date)] != last_date:
+            count = len(table)
+            table.append_bytes(data, line_start, end, encoding)
+            if not last_date and len(table):
+                last_date = data[line_start:line_start + 10]
+            if any(day != table.day[0] for day in table.day[count:]):
+                return end
+        end = line_start
+    return start
+
+def _read_cache(filename:str, data, mtime:int) -> tuple[RecordTable, int]:
+    """Get the cached records and the size of the log file that they cover"""
+    try:
+        with open(_get_cache_filename(filename), 'rb') as fin:
+            magic, version, size, cache_mtime, digest = \
+                _CACHE_HEADER.unpack(fin.read(_CACHE_HEADER.size))
+            if magic != _CACHE_MAGIC or version != _CACHE_VERSION or size > len(data):
+                return RecordTable(), 0
+            if size == len(data) and cache_mtime != mtime:
+                return RecordTable(), 0
+            if _get_digest(data, size) != digest:
+                return RecordTable(), 0
+            return RecordTable.from_file(fin), size
+    except (OSError, ValueError, struct.error):
+        return RecordTable(), 0
+
+def _read_cached_table(filename:str, data, mtime:int, encoding:str) -> RecordTable:
+    """Read the records of a memory-mapped log file using its cache file"""
+    table, offset = _read_cache(filename, data, mtime)
+    size = data.rfind(b'\n') + 1   # only cache complete lines
+    if offset < size:
+        table.append_bytes(data, offset, size, encoding)
+        _write_cache(filename, table, data, size, mtime)
+    table.append_bytes(data, max(offset, size), len(data), encoding)
+    return table
+
+def _write_cache(filename:str, table:RecordTable, data, size:int, mtime:int):
+    """Save the records read from the first bytes of the log file (if possible)"""
+    cachefile = _get_cache_filename(filename)
+    header = _CACHE_HEADER.pack(_CACHE_MAGIC, _CACHE_VERSION, size, mtime,
+                                _get_digest(data, size))
+    try:
+        with open(f'{cachefile}.tmp', 'wb') as fout:
+            fout.write(header)
+            table.to_file(fout)
+        replace(f'{cachefile}.tmp', cachefile)
+    except OSError:
+        pass
+
+def _get_day_lines(data):
+    """Generate the (start, stop) byte offsets of each run of lines with the same date"""
+    first = 0
+    date = None
+    for found in _DATE_PREFIX.finditer(data):
+        if found[0] != date:
+            if date is not None:
+                yield first, found.start()
+                first = found.start()
+            date = found[0]
+    if date is not None:
+        yield first, len(data)
+
+def _get_day_rows(table:RecordTable):
+    """Generate the (start, stop) row indexes of each run of records of the same day"""
+    day = table.day
+    first = 0
+    for index in range(1, len(day)):
+        if day[index] != day[index - 1]:
+            yield first, index
+            first = index
+    if table:
+        yield first, len(day)
+
+def _get_start_of_week(timestamp:datetime) -> datetime:
+    """Get Monday 00:00 of the week of the timestamp"""
+    day = timestamp.date() - timedelta(days=timestamp.weekday())
+    return datetime(day.year, day.month, day.day)
 
 def _get_logfile(date:datetime):
     username = getlogin()
@@ -73,13 +384,31 @@ def _get_logfile(date:datetime):
 def _find_all_logfiles(folder:str):
     logfiles = {}
     username = getlogin()
-    files = glob(f'{folder}/{username}-*.tab')
-    for file in files:
-        if found := re.search(username + r'\-(\d{4}\-\d\d\-\d\d)\.tab', file):
+    files = glob(f'{folder}/{username}-*.tab*')
+    for file in _sort_text_last(files):
+        if found := re.search(username + r'\-(\d{4}\-\d\d\-\d\d)\.tabb?$', file):
             firstday = datetime.strptime(found[1], _FILE_DATE_FORMAT)
             logfiles[firstday] = file
     return logfiles
 
+def _find_team_logfiles(folder:str) -> dict[str,dict[datetime,str]]:
+    team_logfiles = {}
+    files = glob(f'{folder}/**/*-*.tab*', recursive=True)
+    for file in _sort_text_last(files):
+        if found := re.fullmatch(r'(.+)\-(\d{4}\-\d\d\-\d\d)\.tabb?', Path(file).name):
+            firstday = datetime.strptime(found[2], _FILE_DATE_FORMAT)
+            team_logfiles.setdefault(found[1], {})[firstday] = file
+    return team_logfiles
+
+def _sort_text_last(files:list[str]) -> list[str]:
+    """Sort the text log files after the binary ones, so they are used if a week has both"""
+    return sorted(files, key=lambda file: not LogFile.is_binary(file))
+
+def _week_in_range(week:datetime, first_day:datetime, last_day:datetime) -> bool:
+    """Check if the week (its first day) has days in the date range"""
+    return (not first_day or first_day < week + timedelta(days=7)) and \
+           (not last_day or week <= last_day)
+
 def _get_recent_weeks(logfiles:dict, how_many:int) -> list:
     weeks = list(logfiles.keys())
     weeks.sort(reverse=True)
@@ -88,6 +417,8 @@ def _get_recent_weeks(logfiles:dict, how_many:int) -> list:
     return weeks
 
 def _get_selected_week(weeks) -> datetime:
+    # pylint: disable=import-outside-toplevel; The Windows backend only imports on Windows
+    from windows_activity import WindowsActivity
     print('\nChoose a log file:')
     for number, week in enumerate(weeks, 1):
         filename = _get_logfile(week)
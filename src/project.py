@@ -1,6 +1,6 @@
 """Project in the user's activity log"""
 
-from record import Record
+from record_table import RecordTable
 
 _NUM_OF_DAYS = 7
 _POJECT_COLUMN_WIDTH = 45
@@ -34,10 +34,16 @@ class Project():
         """Get the total number of seconds assigned to this project"""
         return self._total
 
-    def add_record(self, record:Record):
-        """Add the time for a record to this project"""
-        self.seconds[record.weekday] += record.seconds
-        self._total += record.seconds
+    def add_project(self, other:'Project'):
+        """Add the time of another instance of this project (such as another week)"""
+        self.seconds = [sum(secs) for secs in zip(self.seconds, other.seconds)]
+        self._total += other.total_seconds
+
+    def add_row(self, table:RecordTable, index:int):
+        """Add the time for a record (a row of the table) to this project"""
+        seconds = table.seconds[index]
+        self.seconds[table.weekday[index]] += seconds
+        self._total += seconds
 
     def clear_seconds(self):
         """Reset the time associated with this project"""
@@ -50,6 +56,18 @@ class Project():
         self.seconds = [sum(secs) for secs in zip(self.seconds, seconds)]
         self._total += sum(seconds)
 
+    def get_state(self) -> dict:
+        """Get the time associated with this project (to save it)"""
+        return {'seconds': self.seconds, 'total': self._total}
+
+    def set_state(self, state:dict):
+        """Restore the time associated with this project from get_state()"""
+        seconds = [float(sec) for sec in state['seconds']]
+        if len(seconds) != _NUM_OF_DAYS:
+            raise ValueError('Invalid number of weekdays')
+        self.seconds = seconds
+        self._total = float(state['total'])
+
     def _get_weekday_hours(self, weekday:int) -> float:
         """Get the number of hours for the given weekday"""
         return round(self.seconds[weekday] / _SECONDS_PER_HOUR, 1)
@@ -0,0 +1,68 @@
+"""Query the indexed log files by date range, application and window title"""
+
+from argparse import ArgumentParser
+from os import getlogin
+from pathlib import Path
+import sys
+
+from analyze import get_date
+from log_index import LogIndex
+
+_LOG_FOLDER = '.'
+
+def parse_arguments():
+    """Get user-selected options"""
+    parser = ArgumentParser()
+    parser.description = """Query the user's activity in the log files of a folder"""
+    parser.add_argument('-f', '--folder',
+                        type=str, default=_LOG_FOLDER,
+                        help='Folder path for log files (and for the index file)')
+    parser.add_argument('--from',
+                        type=get_date, dest='first_day', metavar='DATE',
+                        help='First day (YYYY-MM-DD) of the date range')
+    parser.add_argument('--to',
+                        type=get_date, dest='last_day', metavar='DATE',
+                        help='Last day (YYYY-MM-DD) of the date range')
+    parser.add_argument('-a', '--app',
+                        type=str, default='',
+                        help='Only the records of the application (such as chrome.exe)')
+    parser.add_argument('--title',
+                        type=str, default='',
+                        help='Only the records with the text in their window title')
+    parser.add_argument('--hours',
+                        action='store_true',
+                        help='Show the active and inactive hours of each day'
+                            ' instead of the records')
+    parser.add_argument('--team',
+                        action='store_true',
+                        help='Query the log files of every user in the folder and its sub-folders')
+    return parser.parse_args()
+
+def main():
+    """Update the index of the log files and answer the query"""
+    args = parse_arguments()
+    if args.hours and args.title:
+        sys.exit('\nERROR: The hours per day cannot be selected by window title')
+    user = None if args.team else getlogin()
+    with LogIndex(args.folder) as index:
+        if indexed := index.update():
+            print(f'Indexed {indexed} log files in "{Path(args.folder).absolute()}"')
+        if args.hours:
+            _print_hours(index.get_hours(args.first_day, args.last_day,
+                                         app=args.app, user=user))
+        else:
+            records = index.get_records(args.first_day, args.last_day,
+                                        app=args.app, title=args.title, user=user)
+            for record in records.records():
+                print(record)
+            print(f'{len(records)} records')
+
+def _print_hours(hours:list[tuple[str,float,float]]):
+    print(f'{"Day":10}  {"Active":>7}  {"Inactive":>8}')
+    for day, active, inactive in hours:
+        print(f'{day:10}  {active:7.2f}  {inactive:8.2f}')
+    print(f'{"Total":10}  {sum(row[1] for row in hours):7.2f}  '
+          f'{sum(row[2] for row in hours):8.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,27 @@
 """Record data object -- data for a single line in the activity log."""
 
-from datetime import date, datetime, time, timedelta
+from datetime import date, datetime, timedelta
 
 _DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 _ACTIVE = 'active'
+_ACTIVE_BYTES = _ACTIVE.encode('ascii')
 _HEADER_TEXT = 'Time\tUser_Active\tWindow_Handle\tTitle\tApplication'
 _INACTIVE = 'inactive'
 _NO_HWND = '--------'
+_NO_HWND_BYTES = _NO_HWND.encode('ascii')
 _INVALID_HANDLE = -1
 
 
 class Record():
     """A record found in the activity log."""
 
-    def __init__(self, active:bool=False, hwnd:int=_INVALID_HANDLE, title:str='', app:str=''):
-        self.start : datetime = datetime.now()
+    # pylint: disable=too-many-instance-attributes; The fields derived from the start are cached
+    __slots__ = ('_start', '_day', '_weekday', '_time_of_day',
+                 'active', 'hwnd', 'title', 'app', 'seconds', 'activity')
+
+    def __init__(self, active:bool=False, hwnd:int=_INVALID_HANDLE, title:str='', app:str='',
+                 start:datetime=None):
+        self.start : datetime = start or datetime.now()
         self.active : bool = active
         self.hwnd : int = hwnd
         self.title : str = title
@@ -38,7 +45,12 @@ class Record():
     @property
     def date(self) -> date:
         """Get the calendar day that the record started"""
-        return self.start.date()
+        return date.fromordinal(self._day)
+
+    @property
+    def day(self) -> int:
+        """Get the calendar day (date ordinal) that the record started"""
+        return self._day
 
     @staticmethod
     def header_text() -> str:
@@ -50,6 +62,19 @@ class Record():
         """Returns True if the activity's window handle is valid"""
         return self.hwnd != _INVALID_HANDLE
 
+    @property
+    def start(self) -> datetime:
+        """Get the time that the record started"""
+        return self._start
+
+    @start.setter
+    def start(self, value:datetime):
+        """Set the start time (and the day, weekday and time of day derived from it)"""
+        self._start = value
+        self._day = value.toordinal()
+        self._weekday = (self._day + 6) % 7
+        self._time_of_day = 3600 * value.hour + 60 * value.minute + value.second
+
     @property
     def stop(self):
         """Use the duration to get the activity stop time"""
@@ -61,9 +86,9 @@ class Record():
         self.seconds = (value - self.start).total_seconds()
 
     @property
-    def time_of_day(self) -> time:
-        """Get the time of day that the record started"""
-        return self.start.time()
+    def time_of_day(self) -> int:
+        """Get the time of day (seconds after midnight) that the record started"""
+        return self._time_of_day
 
     @property
     def weekday(self) -> int:
@@ -71,7 +96,7 @@ class Record():
 
         0 (Monday) through 6 (Sunday)
         """
-        return self.start.date().weekday()
+        return self._weekday
 
     def raw_text(self) -> str:
         """Get a string with the raw input values and no processed data"""
@@ -79,19 +104,40 @@ class Record():
         return f'{start}\t{active}\t{hwnd}\t{self.title}\t{self.app}'
 
     @staticmethod
-    def from_string(string:str):
-        """Generate a new record from a string"""
-        try:
-            start, active, hwnd, title, app = string.strip('\r\n').split('\t')
-            hwnd = _INVALID_HANDLE if hwnd == _NO_HWND else int(hwnd, base=16)
-            record = Record(active == _ACTIVE, hwnd, title, app)
-            record.start = datetime.strptime(start, _DATETIME_FORMAT)
-            return record
-        except ValueError:
-            return None
+    def split_bytes(line:bytes, encoding:str) -> tuple[datetime, bool, int, bytes, bytes]:
+        """Split a raw line into the start, active, hwnd, title, and app values
+
+        The title and app are returned as raw bytes so that the caller decides
+        when to decode them. The line must not include the line ending and the
+        encoding must be ASCII-compatible. Raises ValueError if the line is not a
+        valid record."""
+        start, active, hwnd, title, app = line.split(b'\t')
+        hwnd = _INVALID_HANDLE if hwnd == _NO_HWND_BYTES else int(hwnd, base=16)
+        return _parse_datetime(start.decode(encoding)), active == _ACTIVE_BYTES, hwnd, title, app
+
+    @staticmethod
+    def split_string(string:str) -> tuple[datetime, bool, int, str, str]:
+        """Split a string into the start, active, hwnd, title, and app values
+
+        Raises ValueError if the string is not a valid record."""
+        start, active, hwnd, title, app = string.strip('\r\n').split('\t')
+        hwnd = _INVALID_HANDLE if hwnd == _NO_HWND else int(hwnd, base=16)
+        return _parse_datetime(start), active == _ACTIVE, hwnd, title, app
 
     def _format_raw(self) -> tuple:
         start = self.start.strftime(_DATETIME_FORMAT)
         active = _ACTIVE if self.active else _INACTIVE
         hwnd = _NO_HWND if self.hwnd == _INVALID_HANDLE else f'{self.hwnd:08X}'
         return start, active, hwnd
+
+
+def _parse_datetime(text:str) -> datetime:
+    """Parse a log file timestamp
+
+    Timestamps written by the tracker always have the fixed-width
+    'YYYY-MM-DD HH:MM:SS' layout, which is decoded without strptime().
+    Anything else falls back to strptime() so the same text is accepted."""
+    if len(text) == 19 and text[4::3] == '-- ::' and text.isascii() and \
+            (text[:4] + text[5:7] + text[8:10] + text[11:13] + text[14:16] + text[17:]).isdigit():
+        return datetime.fromisoformat(text)
+    return datetime.strptime(text, _DATETIME_FORMAT)
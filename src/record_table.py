@@ -0,0 +1,244 @@
+"""Columnar storage for the records of an activity log"""
+
+from array import array
+from datetime import datetime, timedelta
+from io import BytesIO, TextIOWrapper
+import struct
+
+from record import Record
+
+_CHUNK_SIZE = 1 << 20
+_COLUMNS = ('start', 'seconds', 'active', 'hwnd', 'title', 'app', 'activity', 'day', 'weekday')
+_PACKED_SIZES = struct.Struct('<II')    # number of records, size of the strings
+_SECONDS_PER_DAY = 86400
+_STRING_COLUMNS = ('title', 'app', 'activity')
+
+class RecordTable():
+    """Records of an activity log stored as parallel columns
+
+    Each record is a row index into the columns. Titles, applications and
+    activities are interned and stored as ids into the strings list. The
+    start time is stored as seconds since 0001-01-01 00:00:00 (local time)."""
+    # pylint: disable=too-many-instance-attributes; One attribute per column
+    def __init__(self):
+        self.start = array('q')
+        self.seconds = array('d')
+        self.active = array('b')
+        self.hwnd = array('q')
+        self.title = array('i')
+        self.app = array('i')
+        self.activity = array('i')
+        self.day = array('i')       # calendar day as a date ordinal
+        self.weekday = array('b')   # 0 (Monday) through 6 (Sunday)
+        self.strings:list[str] = ['']
+        self._string_ids:dict[str,int] = {'': 0}
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @staticmethod
+    def from_file(fin) -> 'RecordTable':
+        """Generate a new table from a binary file written by to_file()
+
+        Raises ValueError if the file does not contain a packed table."""
+        try:
+            count, strings_size = _PACKED_SIZES.unpack(fin.read(_PACKED_SIZES.size))
+            table = RecordTable()
+            for name in _COLUMNS:
+                getattr(table, name).fromfile(fin, count)
+        except (struct.error, EOFError) as error:
+            raise ValueError('Invalid packed record table') from error
+        strings = fin.read()
+        if len(strings) != strings_size:
+            raise ValueError('Invalid packed record table')
+        table.strings = strings.decode('utf-8').split('\n')
+        # pylint: disable=protected-access; The string ids are rebuilt by the table's own class
+        table._string_ids = {string: index for index, string in enumerate(table.strings)}
+        return table
+
+    def append(self, start:datetime, active:bool, hwnd:int, title:str, app:str,
+               activity:str='', seconds:float=0):
+        """Add a record to the end of the table"""
+        # pylint: disable=too-many-arguments; One argument per record field
+        self._append_ids(start, active, hwnd, self.intern(title), self.intern(app),
+                         self.intern(activity), seconds)
+
+    def append_bytes(self, data, start:int, stop:int, encoding:str):
+        """Add records from the raw lines of a log file (skipping invalid lines)
+
+        The data can be any buffer (such as a memory-mapped file). Line and
+        field boundaries are found in the raw bytes and each distinct title and
+        app is decoded only once. The encoding must be ASCII-compatible."""
+        byte_ids:dict[bytes,int] = {}
+        for line in _split_lines(data, start, stop):
+            if line.endswith(b'\r'):
+                line = line[:-1]
+            if b'\r' in line:
+                # Text mode splits lines at a lone carriage return
+                self.append_strings(TextIOWrapper(BytesIO(line), encoding=encoding))
+                continue
+            try:
+                start_time, active, hwnd, title, app = Record.split_bytes(line, encoding)
+            except ValueError:
+                continue
+            title_id = byte_ids.get(title)
+            if title_id is None:
+                title_id = byte_ids[title] = self.intern(title.decode(encoding))
+            app_id = byte_ids.get(app)
+            if app_id is None:
+                app_id = byte_ids[app] = self.intern(app.decode(encoding))
+            self._append_ids(start_time, active, hwnd, title_id, app_id)
+
+    def append_strings(self, strings):
+        """Add records from the lines of a log file (skipping invalid lines)"""
+        for string in strings:
+            try:
+                start, active, hwnd, title, app = Record.split_string(string)
+            except ValueError:
+                continue
+            self.append(start, active, hwnd, title, app)
+
+    def copy(self, first:int=0, stop:int=None) -> 'RecordTable':
+        """Copy a range of rows into a new table (with only the strings they use)"""
+        table = RecordTable()
+        strings = self.strings
+        for name in _COLUMNS:
+            column = getattr(self, name)[first:stop]
+            if name in _STRING_COLUMNS:
+                column = array('i', [table.intern(strings[index]) for index in column])
+            setattr(table, name, column)
+        return table
+
+    def days_ascend(self) -> bool:
+        """Check that no record is of an earlier calendar day than the record before it"""
+        day = self.day
+        return all(day[index] <= day[index + 1] for index in range(len(day) - 1))
+
+    def extend(self, table:'RecordTable', indexes:list[int]=None):
+        """Add the rows of another table (or only the given rows) to the end of the table"""
+        rows = range(len(table)) if indexes is None else indexes
+        strings = table.strings
+        for name in _COLUMNS:
+            column = getattr(table, name)
+            values = [column[index] for index in rows]
+            if name in _STRING_COLUMNS:
+                values = [self.intern(strings[string_id]) for string_id in values]
+            getattr(self, name).extend(values)
+
+    def find_last_day(self) -> int:
+        """Get the row index of the first record of the last day in the table"""
+        day = self.day
+        index = len(day)
+        while index and day[index - 1] == day[-1]:
+            index -= 1
+        return index
+
+    def intern(self, string:str) -> int:
+        """Get the id of a string (adding it to the strings list if needed)"""
+        string_id = self._string_ids.setdefault(string, len(self.strings))
+        if string_id == len(self.strings):
+            self.strings.append(string)
+        return string_id
+
+    def keep(self, indexes:list[int]):
+        """Keep only the records at the given (sorted) row indexes"""
+        for name in _COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[index] for index in indexes]))
+
+    def record(self, index:int) -> Record:
+        """Get a record object for a row of the table"""
+        strings = self.strings
+        record = Record(bool(self.active[index]), self.hwnd[index],
+                        strings[self.title[index]], strings[self.app[index]],
+                        self.start_time(index))
+        record.seconds = self.seconds[index]
+        record.activity = strings[self.activity[index]]
+        return record
+
+    def records(self):
+        """Generate record objects for every row of the table"""
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def set_durations(self):
+        """Each record lasts until the next record (or the end of its day)"""
+        start = self.start
+        day = self.day
+        for index in range(len(start) - 1):
+            if day[index] == day[index + 1]:
+                self.seconds[index] = start[index + 1] - start[index]
+            else:
+                self.seconds[index] = 0
+
+    @staticmethod
+    def split_days(data, start:int, stop:int, encoding:str):
+        """Generate a table for each calendar day in the raw lines of a log file
+
+        The lines are parsed one chunk at a time, so only the records of the
+        current day (and of one chunk) are held in memory."""
+        table = RecordTable()
+        for first, end in _get_chunks(data, start, stop):
+            checked = max(len(table), 1)
+            table.append_bytes(data, first, end, encoding)
+            day = table.day
+            day_start = 0
+            for index in range(checked, len(day)):
+                if day[index] != day[index - 1]:
+                    yield table.copy(day_start, index)
+                    day_start = index
+            if day_start:
+                table = table.copy(day_start)
+        if table:
+            yield table
+
+    def start_time(self, index:int) -> datetime:
+        """Get the time that the record started"""
+        return datetime.fromordinal(self.day[index]) + \
+            timedelta(seconds=self.time_of_day(index))
+
+    def stop(self, index:int) -> float:
+        """Get the time (in table seconds) that the record stopped"""
+        return self.start[index] + self.seconds[index]
+
+    def _append_ids(self, start:datetime, active:bool, hwnd:int, title:int, app:int,
+                    activity:int=0, seconds:float=0):
+        # pylint: disable=too-many-arguments; One argument per record field
+        day = start.toordinal()
+        self.start.append(day * _SECONDS_PER_DAY +
+                          3600 * start.hour + 60 * start.minute + start.second)
+        self.seconds.append(seconds)
+        self.active.append(active)
+        self.hwnd.append(hwnd)
+        self.title.append(title)
+        self.app.append(app)
+        self.activity.append(activity)
+        self.day.append(day)
+        self.weekday.append((day + 6) % 7)
+
+    def to_file(self, fout):
+        """Write the table to a binary file (log lines never contain a newline)"""
+        strings = '\n'.join(self.strings).encode('utf-8')
+        fout.write(_PACKED_SIZES.pack(len(self), len(strings)))
+        for name in _COLUMNS:
+            getattr(self, name).tofile(fout)
+        fout.write(strings)
+
+    def time_of_day(self, index:int) -> int:
+        """Get the time of day (seconds after midnight) that the record started"""
+        return self.start[index] - self.day[index] * _SECONDS_PER_DAY
+
+def _get_chunks(data, start:int, stop:int):
+    """Generate the (start, stop) ranges of about one chunk of complete lines"""
+    while start < stop:
+        end = stop
+        if start + _CHUNK_SIZE < stop:
+            end = data.rfind(b'\n', start, start + _CHUNK_SIZE) + 1 or \
+                  data.find(b'\n', start + _CHUNK_SIZE, stop) + 1 or stop
+        yield start, end
+        start = end
+
+def _split_lines(data, start:int, stop:int):
+    """Generate the lines in the data (one chunk of complete lines at a time)"""
+    for first, end in _get_chunks(data, start, stop):
+        yield from data[first:end].split(b'\n')
@@ -0,0 +1,95 @@
+"""Replay the user activity of a log file with the same interface as WindowsActivity"""
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from threading import Event
+
+from logfile import LogFile
+
+_END_SECONDS = 10 * 60      # keep replaying after the last record (longer than inactive)
+_SECONDS_PER_DAY = 86400
+
+class ReplayActivity():
+    """Utilities to replay the user activity of a log file on any platform
+
+    The clock of the replay starts at the first record and it only advances
+    when the tracker sleeps, so a replay is deterministic. Each sleep waits
+    for its time divided by the speed-up factor (or not at all if the factor
+    is 0). The replay presses 'q' after the last record to stop the tracker."""
+
+    def __init__(self, filename:str, speed:float=0):
+        self.records = LogFile.read_table(filename)
+        self.speed = speed
+        start = self.records.start
+        self._first = start[0] if start else 0
+        self._end = start[-1] + _END_SECONDS if start else 0
+        self._clock = self._first
+        self._index = -1
+        self._input = 0
+        self._update_index()
+
+    def end_time(self) -> datetime:
+        """Get the local date and time when the replay presses 'q'"""
+        return _get_datetime(self._end)
+
+    def get_active_window_handle(self) -> int:
+        """Get the handle of the window of the current record"""
+        return self.records.hwnd[self._index] if self._index >= 0 else -1
+
+    def get_app_path(self, hwnd) -> str:
+        """Get the application of the current record"""
+        # pylint: disable=unused-argument; The current record has the window of the handle
+        return self._get_string(self.records.app)
+
+    def get_keypress(self) -> str:
+        """Get the 'q' key to quit after the last record"""
+        return 'q' if self._clock >= self._end else ''
+
+    def get_uptime_ms(self) -> int:
+        """Get the time (ms) since the first record"""
+        return int(1000 * (self._clock - self._first))
+
+    def get_user_input_ms(self) -> int:
+        """Get the time (ms since the first record) of the last user input
+
+        The user is busy during active records. During inactive records, the
+        last user input is the start of the first inactive record."""
+        if self._index >= 0 and self.records.active[self._index]:
+            return self.get_uptime_ms()
+        return int(1000 * (self._input - self._first))
+
+    def get_window_title(self, hwnd) -> str:
+        """Get the window title of the current record"""
+        # pylint: disable=unused-argument; The current record has the window of the handle
+        return self._get_string(self.records.title)
+
+    def now(self) -> datetime:
+        """Get the local date and time of the replay clock"""
+        return _get_datetime(self._clock)
+
+    def sleep(self, seconds:float, stop:Event):
+        """Advance the replay clock (waiting for a fraction of the time)"""
+        if self.speed:
+            stop.wait(seconds / self.speed)
+        self._clock += seconds
+        self._update_index()
+
+    def _get_string(self, column) -> str:
+        return self.records.strings[column[self._index]] if self._index >= 0 else ''
+
+    def _update_index(self):
+        """Find the current record and the start of the inactive records before it"""
+        records = self.records
+        index = bisect_right(records.start, self._clock) - 1
+        if index == self._index:
+            return
+        self._index = index
+        if index >= 0 and not records.active[index]:
+            while index > 0 and not records.active[index - 1]:
+                index -= 1
+            self._input = records.start[index]
+
+def _get_datetime(timestamp:float) -> datetime:
+    """Get the local date and time of a record table timestamp"""
+    day, seconds = divmod(timestamp, _SECONDS_PER_DAY)
+    return datetime.fromordinal(int(day)) + timedelta(seconds=seconds)
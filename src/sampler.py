@@ -0,0 +1,132 @@
+"""Change-driven sampling of the user activity"""
+
+from pathlib import Path
+from threading import Event
+import time
+
+from activity_source import ActivitySource
+from record import Record
+
+_HISTOGRAM_BUCKETS = 12        # < 1 ms, < 2 ms, < 4 ms, ... and >= 1024 ms
+_IDLE_BACKOFF = 2.0             # sample interval multiplier while there is no user input
+_MAX_INTERVAL_FACTOR = 5.0      # longest sample interval (times the sample period)
+_REFRESH_SECONDS = 10.0         # read the title and app even if nothing else changed
+
+class ActivitySampler():
+    """Sample the user activity, only reading the expensive values when needed
+
+    The foreground window handle and the time of the last user input are
+    cheap to read, so they are checked on every sample. The window title and
+    the application path are only read again when one of them changes or
+    when the refresh period expires. The sample interval backs off while the
+    user is idle and returns to the sample period on the next user input.
+    Samples are taken at ticks of the clock of the activity source, so a
+    slow sample does not delay the ticks that follow it."""
+    # pylint: disable=too-many-instance-attributes; Probed values are kept between samples
+    def __init__(self, winact:ActivitySource, inactive:float, period:float,
+                 refresh:float=_REFRESH_SECONDS):
+        self.winact = winact
+        self.inactive = inactive
+        self.period = period
+        self.refresh = refresh
+        self.interval = period
+        self.stats = SamplerStats()
+        self._hwnd = None
+        self._input_ms = None
+        self._title = ''
+        self._app = ''
+        self._refreshed = None
+        self._tick = None
+
+    def sample(self) -> Record:
+        """Get a record with the current user activity"""
+        started = time.perf_counter()
+        winact = self.winact
+        uptime = winact.get_uptime_ms()
+        input_ms = winact.get_user_input_ms()
+        hwnd = winact.get_active_window_handle()
+        now = uptime / 1000
+        if self._tick is not None:
+            self.stats.drift.add(1000 * (now - self._tick))
+        refresh = self._refreshed is None or now - self._refreshed >= self.refresh
+        if hwnd != self._hwnd or refresh:
+            self._app = Path(winact.get_app_path(hwnd)).name.lower()
+            self.stats.app_reads += 1
+        if hwnd != self._hwnd or input_ms != self._input_ms or refresh:
+            self._title = winact.get_window_title(hwnd)
+            self.stats.title_reads += 1
+        if refresh:
+            self._refreshed = now
+        if input_ms != self._input_ms:
+            self.interval = self.period
+        else:
+            self.interval = min(self.interval * _IDLE_BACKOFF,
+                                self.period * _MAX_INTERVAL_FACTOR)
+        self._hwnd = hwnd
+        self._input_ms = input_ms
+        self.stats.samples += 1
+        active = uptime - input_ms < 1000 * self.inactive
+        record = Record(active, hwnd, self._title, self._app, winact.now())
+        self.stats.latency.add(1000 * (time.perf_counter() - started))
+        return record
+
+    def wait(self, stop:Event) -> bool:
+        """Wait for the next tick of the sample clock (False if the stop event is set)
+
+        The next tick is one interval after the previous tick. If that tick
+        has already passed, the missed ticks are skipped."""
+        now = self.winact.get_uptime_ms() / 1000
+        tick = (now if self._tick is None else self._tick) + self.interval
+        if tick < now and self.interval > 0:
+            missed = int((now - tick) // self.interval) + 1
+            tick += missed * self.interval
+            self.stats.skipped += missed
+        self._tick = tick
+        self.winact.sleep(tick - now, stop)
+        return not stop.is_set()
+
+class Histogram():
+    """Count durations (ms) in buckets that double in size"""
+    def __init__(self):
+        self.counts = [0] * _HISTOGRAM_BUCKETS
+        self.maximum = 0.0
+
+    def __str__(self) -> str:
+        labels = [f'<{1 << bucket}ms' for bucket in range(_HISTOGRAM_BUCKETS - 1)]
+        labels.append(f'>={1 << (_HISTOGRAM_BUCKETS - 2)}ms')
+        return ' '.join(f'{label}:{count}' for label, count in zip(labels, self.counts)
+                        if count) + f' (max {self.maximum:.1f}ms)'
+
+    def add(self, milliseconds:float):
+        """Count a duration"""
+        bucket = max(int(milliseconds), 0).bit_length()
+        self.counts[min(bucket, _HISTOGRAM_BUCKETS - 1)] += 1
+        self.maximum = max(self.maximum, milliseconds)
+
+class SamplerStats():
+    """Count the samples and the expensive reads of the sampler
+
+    The drift is how late each sample was taken after its tick and the
+    latency is how long each sample took."""
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes; Counters only
+    def __init__(self):
+        self.samples = 0
+        self.skipped = 0
+        self.drift = Histogram()
+        self.latency = Histogram()
+        self.title_reads = 0
+        self.app_reads = 0
+        self._start = time.monotonic()
+        self._cpu_start = time.process_time()
+
+    def __str__(self) -> str:
+        seconds = max(time.monotonic() - self._start, 1e-6)
+        cpu_seconds = time.process_time() - self._cpu_start
+        hours = seconds / 3600
+        return (f'{self.samples / hours:.0f} wakeups/hour, '
+                f'{self.title_reads / hours:.0f} title reads/hour, '
+                f'{self.app_reads / hours:.0f} app reads/hour, '
+                f'CPU {100 * cpu_seconds / seconds:.3f}%, '
+                f'{self.skipped} skipped ticks\n'
+                f'  drift:   {self.drift}\n'
+                f'  latency: {self.latency}')
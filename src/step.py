@@ -1,56 +1,177 @@
 """Analysis of the user's activity log"""
 
-from datetime import date, datetime, time, timedelta
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from operator import not_, truth
 import re
-import sys
 
-from record import Record
+from literal_filter import LiteralFilter, get_required_literals
+from record_table import RecordTable
+from string_memo import StringMemo
+
+_NEGATE = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+_SECONDS_PER_DAY = 86400
+_TIME_FORMAT = re.compile(r'([01]\d|2[0-3]):[0-5]\d|24:00')    # HH:MM from 00:00 to 24:00
 
 class Activity():
     """Represents an activity as a group of records"""
-    def __init__(self, first=-1, first_record=None):
+    def __init__(self, table:RecordTable, first=-1):
+        self.table = table
         self.first_index = first
-        self.first_record:Record = first_record
         self.last_index = -1
-        self.last_record:Record = None
 
     @property
-    def date(self) -> date:
-        """Get the calendar day that the activity started"""
-        return self.first_record.date
+    def date(self) -> int:
+        """Get the calendar day (date ordinal) that the activity started"""
+        return self.table.day[self.first_index]
 
     @property
-    def duration(self) -> timedelta:
-        """Get the duration of the activity"""
-        return self.last_record.stop - self.first_record.start
+    def duration(self) -> float:
+        """Get the duration (seconds) of the activity"""
+        return self.table.stop(self.last_index) - self.table.start[self.first_index]
 
     @property
     def is_valid(self) -> bool:
         """Verify that both the first and last records are identified"""
-        return self.first_index >= 0 and self.first_record and\
-                self.last_index >= 0 and self.last_record
+        return self.first_index >= 0 and self.last_index >= 0
+
+class Rule():
+    """Compiled criteria used to match a single record
+
+    The criteria are compiled once when the configuration is loaded so that
+    matching a record only evaluates the prebuilt predicates. The app and
+    title patterns are searched once for each distinct string."""
+    def __init__(self, rule:dict, crit_filter:list[str]=None):
+        self.tagged = None
+        self.active = None
+        self.app:_MatchCache = None
+        self.title:_MatchCache = None
+        if not crit_filter or 'tagged' not in crit_filter:
+            self.tagged = rule.get('tagged', False)
+        for criteria in rule:
+            if crit_filter and criteria not in crit_filter:
+                continue
+            match criteria:
+                case 'active':
+                    self.active = rule[criteria]
+                case 'app':
+                    self.app = _MatchCache(re.compile(rule[criteria], flags=re.IGNORECASE))
+                case 'title':
+                    title = _compile_title(rule[criteria])
+                    self.title = _MatchCache(title, _get_pattern_literals(title))
+
+    def find_matches(self, table:RecordTable, tod_window:tuple[int,int]=None) -> list[int]:
+        """Get the indexes of the records that satisfy the rule criteria (and start in the window)
+
+        The simple criteria are evaluated over whole columns at once, and the
+        app and title patterns are only searched once for each distinct id
+        in the records that satisfy the simple criteria."""
+        rows = range(len(table))
+        if isinstance(self.tagged, bool):
+            rows = compress(rows, map(truth if self.tagged else not_, table.activity))
+        elif isinstance(self.tagged, str):
+            if self.tagged not in table.strings:
+                return []
+            rows = compress(rows, map(table.strings.index(self.tagged).__eq__, table.activity))
+        if self.active is not None:
+            active = table.active.tobytes()
+            if not self.active:
+                active = active.translate(_NEGATE)
+            rows = compress(rows, active) if isinstance(rows, range) else \
+                   filter(active.__getitem__, rows)
+        rows = list(rows)
+        if tod_window:
+            min_tod, max_tod = tod_window
+            start, day = table.start, table.day
+            rows = [index for index in rows
+                    if min_tod <= start[index] - day[index] * _SECONDS_PER_DAY <= max_tod]
+        for cache, column in ((self.app, table.app), (self.title, table.title)):
+            if cache and rows:
+                ids = list(map(column.__getitem__, rows))
+                found = {string_id: cache.search(table.strings, string_id)
+                         for string_id in set(ids)}
+                rows = list(compress(rows, map(found.__getitem__, ids)))
+        return rows
+
+    def match(self, table:RecordTable, index:int) -> bool:
+        """Check if the record satisfies all of the rule criteria"""
+        if isinstance(self.tagged, bool):
+            if bool(table.activity[index]) != self.tagged:
+                return False
+        elif isinstance(self.tagged, str):
+            if table.strings[table.activity[index]] != self.tagged:
+                return False
+        if self.active is not None and table.active[index] != self.active:
+            return False
+        if self.app and not self.app.search(table.strings, table.app[index]):
+            return False
+        if self.title and not self.title.search(table.strings, table.title[index]):
+            return False
+        return True
 
 class Step():
-    """Represents an analysis step applied to a list of records"""
-    def __init__(self):
+    """Represents an analysis step applied to a table of records
+
+    The time-of-day and duration windows are converted to seconds once, and
+    ValueError is raised if they are not valid."""
+    # pylint: disable=too-many-instance-attributes; Compiled criteria are kept with the step
+    def __init__(self, step:dict):
         self.activities:list[Activity] = []
-        self.records = []
-        self.step = {}
-        self.stop_search = False
+        self.records = RecordTable()
+        self.step = step
+        self.index:_RecordIndex = None
+        self.first_matches:list[int] = []
+
+        first_rule = step['first']
+        last_rule = step['last']
+        self.first_rule = Rule(first_rule)
+        self.last_rule = Rule(last_rule)
+        self.started_at = None
+        self.duration = None
+        try:
+            if started_at := first_rule.get('started_at', {}):
+                self.started_at = _get_tod_window(started_at)
+            if duration := last_rule.get('duration', {}):
+                self.duration = _get_duration_window(duration)
+        except ValueError as error:
+            raise ValueError(f'Step "{step.get("activity", "")}": {error}') from error
+        self.continuous:Rule = None
+        if continuous := last_rule.get('continuous', []):
+            if isinstance(continuous, bool):
+                self.continuous = self.first_rule
+            elif isinstance(continuous, list):
+                self.continuous = Rule(first_rule, continuous)
+        self.exact_title = last_rule.get('intermittent') == 'exact_title'
 
-    def apply(self, step:dict, records:list[Record]):
+    @staticmethod
+    def share_literal_filter(steps:list['Step']):
+        """Prefilter the title patterns of all the steps with a single literal filter
+
+        A title pattern is only searched in the titles that contain one of
+        its required literals. The titles are scanned for the literals of
+        all the patterns at once (and only once for each distinct title)."""
+        caches = [rule.title for step in steps
+                  for rule in (step.first_rule, step.last_rule, step.continuous)
+                  if rule and rule.title and rule.title.literals]
+        literal_filter = LiteralFilter(set().union(*(cache.literals for cache in caches)))
+        for cache in caches:
+            cache.literal_filter = literal_filter
+
+    def apply(self, records:RecordTable):
         """Update the records based on the step criteria."""
-        self.step = step
         self.records = records
         self.activities = []
+        self.index = None
+        self.first_matches = self.first_rule.find_matches(records, self.started_at)
         self._find_step_activities()
         if self.activities:
             self._collapse_records()
 
     def _find_step_activities(self):
-        """Find all activities in the list of records"""
+        """Find all activities in the table of records"""
         index = 0
-        while index < len(self.records):
+        count = len(self.records)
+        while index < count:
             activity = self._find_first_record(index)
             if not activity:
                 break
@@ -59,164 +180,237 @@ class Step():
                 self.activities.append(activity)
                 index = activity.last_index + 1
             else:
-                index += 1
+                index = activity.first_index + 1
 
     def _find_first_record(self, index) -> Activity:
-        """Find the first record that satisfies the first_rule criteria"""
-        while index < len(self.records):
-            record = self.records[index]
-            if self._match_first_rule(record):
-                return Activity(index, record)
-            index += 1
+        """Find the first record (from the index) that satisfies the first_rule criteria"""
+        found = bisect_left(self.first_matches, index)
+        if found < len(self.first_matches):
+            return Activity(self.records, self.first_matches[found])
         return None
 
-    def _match_first_rule(self, record:Record) -> bool:
-        first_rule = self.step['first']
-        if not _match_record(record, first_rule):
-            return False
-        if started_at := first_rule.get('started_at', {}):
-            if not _in_tod_window(record.time_of_day, started_at):
-                return False
-        return True
-
     def _find_last_record(self, activity:Activity):
         """Find the last record that satisfies the last_rule criteria"""
-        index = activity.first_index
-        self.stop_search = False
-        while index < len(self.records):
-            record = self.records[index]
-            if self._match_last_rule(record, activity):
-                activity.last_index = index
-                activity.last_record = record
-            if self.stop_search:
-                break
-            index += 1
-
-    def _match_last_rule(self, record:Record, activity:Activity) -> bool:
-        last_rule = self.step['last']
-
-        # Check conditions that will stop the search if they are not satisfied
-        matched = record.date == activity.date
+        stop_index = self._find_stop_index(activity)
+        key = self.records.title[activity.first_index] if self.exact_title else None
+        positions = self.index.matches.get(key, [])
+        found = bisect_left(positions, stop_index) - 1
+        if found >= 0 and positions[found] >= activity.first_index:
+            activity.last_index = positions[found]
 
-        if matched and (duration := last_rule.get('duration', {})):
-            matched = self._check_duration(duration, activity, record)
-
-        if matched and (continuous := last_rule.get('continuous', [])):
-            matched = self._match_continuous(continuous, record)
-
-        if not matched:
-            self.stop_search = True
-            return False
+    def _find_stop_index(self, activity:Activity) -> int:
+        """Find the first record that does not satisfy the conditions to continue the search"""
+        first_index = activity.first_index
+        if not self.index or first_index >= self.index.end:
+            self.index = _RecordIndex(self, first_index)
+        stop_limit = None
+        if self.duration and self.duration[1] is not None:
+            stop_limit = self.records.start[first_index] + self.duration[1]
+        while True:
+            end = self.index.end
+            stop_index = _next_position(self.index.day_bounds, first_index, end)
+            stop_index = _next_position(self.index.breaks, first_index - 1, stop_index)
+            if self.duration:
+                stop_index = self._check_duration(activity, stop_index)
+            if stop_index < end or end == len(self.records):
+                return stop_index
+            self.index.extend(stop_limit)
 
-        # Check conditions that will not stop the search
-        matched = _match_record(record, last_rule)
-
-        if matched and (intermittent := last_rule.get('intermittent', str)):
-            if intermittent == 'exact_title':
-                matched = activity.first_record.title == record.title
-
-        return matched
-
-    def _match_continuous(self, config:str, record:Record) -> bool:
-        first_rule = self.step['first']
-        matched = True
-        if isinstance(config, bool) and config:
-            matched = _match_record(record, first_rule)
-        elif isinstance(config, list):
-            matched = _match_record(record, first_rule, config)
-        if not matched:
-            self.stop_search = True
-        return matched
-
-    def _check_duration(self, config:dict, activity:Activity, record:Record) -> bool:
-        duration = record.stop - activity.first_record.start
-        too_short, too_long = _in_duration_window(duration, config)
-        if too_long:
-            self.stop_search = True
-        if too_short or too_long:
-            return False
-        return True
+    def _check_duration(self, activity:Activity, stop_index:int) -> int:
+        """Find the first record that makes the activity too short or too long"""
+        min_duration, max_duration = self.duration
+        index = activity.first_index
+        start = self.records.start[index]
+        while index < stop_index:
+            # Stop times never decrease within a run of records
+            run_end = _next_position(self.index.descents, index, stop_index)
+            if min_duration is not None and self.index.stop(index) < start + min_duration:
+                return index
+            if max_duration is not None:
+                too_long = self.index.find_stop_after(start + max_duration, index, run_end)
+                if too_long < run_end:
+                    return too_long
+            index = run_end
+        return stop_index
 
     def _collapse_records(self):
-        """Update the list of records based on the previous analysis
+        """Update the table of records based on the previous analysis
 
         Collapses groups of records that represent an activity into a single
-        record in the list."""
+        record in the table. The collapsed rows are found in a single pass."""
         self._check_one_per_day()
 
-        for activity in reversed(self.activities):
-            activity.first_record.stop = activity.last_record.stop
-            activity.first_record.activity = self.step['activity']
-            del self.records[activity.first_index + 1:activity.last_index + 1]
+        table = self.records
+        activity_id = table.intern(self.step['activity'])
+        rows = []
+        index = 0
+        for activity in self.activities:
+            first_index = activity.first_index
+            rows.extend(range(index, first_index + 1))
+            table.seconds[first_index] = table.stop(activity.last_index) - table.start[first_index]
+            table.activity[first_index] = activity_id
+            index = activity.last_index + 1
+        rows.extend(range(index, len(table)))
+        table.keep(rows)
 
     def _check_one_per_day(self):
         if 'one_per_day' not in self.step:
             return
-        index = 0
-        while index + 1 < len(self.activities):
-            prev_activity = self.activities[index]
-            next_activity = self.activities[index + 1]
-            if prev_activity.date == next_activity.date:
-                self._remove_activity_by_duration(index, self.step['one_per_day'])
+        method = self.step['one_per_day']
+        activities:list[Activity] = []
+        for activity in self.activities:
+            if activities and activities[-1].date == activity.date:
+                activities[-1] = _select_by_duration(activities[-1], activity, method)
             else:
-                index += 1
-
-    def _remove_activity_by_duration(self, index:int, method:str):
-        dur1 = self.activities[index].duration
-        dur2 = self.activities[index + 1].duration
-        remove_index:int
-        if method == 'shortest':
-            remove_index = index if dur1 > dur2 else index + 1
-        elif method == 'longest':
-            remove_index = index if dur1 < dur2 else index + 1
-        del self.activities[remove_index]
-
-def _match_record(record:Record, rule:dict, crit_filter:list[str]=None) -> bool:
-    if not crit_filter or 'tagged' not in crit_filter:
-        tagged = rule.get('tagged', False)
-        if isinstance(tagged, bool):
-            if bool(record.activity) != tagged:
-                return False
-        elif isinstance(tagged, str):
-            if record.activity != tagged:
-                return False
-    for criteria in rule:
-        if crit_filter and criteria not in crit_filter:
-            continue
-        match criteria:
-            case 'active':
-                if record.active != rule[criteria]:
-                    return False
-            case 'app':
-                if not re.search(rule[criteria], record.app, flags=re.IGNORECASE):
-                    return False
-            case 'title':
-                re_crits = rule[criteria]
-                if isinstance(re_crits, str):
-                    re_crits = [re_crits]
-                if all(not re.search(re_str, record.title, flags=re.IGNORECASE)
-                       for re_str in re_crits):
-                    return False
-    return True
-
-def _in_duration_window(duration:timedelta, window:dict):
-    too_short = False
-    too_long = False
-    if 'min' in window:
-        min_duration = _get_duration(window['min'])
-        too_short = duration < min_duration
-    if 'max' in window:
-        max_duration = _get_duration(window['max'])
-        too_long = duration > max_duration
-    return too_short, too_long
-
-def _get_duration(duration_text:str) -> timedelta:
-    if found := re.fullmatch(r'(\d\d):(\d\d)', duration_text):
-        return timedelta(seconds=3600 * int(found[1]) + 60 * int(found[2]))
-    print(f'WARNING: Invalid duration format ("{duration_text}")', file=sys.stderr)
-    return timedelta()
-
-def _in_tod_window(time_of_day:time, window:dict) -> bool:
-    min_tod = datetime.strptime(window.get('min', '00:00'), '%H:%M').time()
-    max_tod = datetime.strptime(window.get('max', '23:59'), '%H:%M').time()
-    return min_tod <= time_of_day <= max_tod
+                activities.append(activity)
+        self.activities = activities
+
+class _RecordIndex():
+    """Record positions used to find the last record of an activity
+
+    Records are indexed on demand as the search moves forward through the
+    list, so each record is indexed at most once per Step.apply(). Finding
+    the last record is then a binary search instead of a forward scan."""
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, step:Step, start:int):
+        self.step = step
+        self.start = start
+        self.end = start
+        self.day_bounds:list[int] = []      # first record of each calendar day
+        self.breaks:list[int] = []          # records that break a continuous activity
+        self.descents:list[int] = []        # records that stop before the previous record
+        self.matches:dict[int,list[int]] = {}   # records that match the last rule
+        self._stops:list[float] = []
+        self._date = step.records.day[start]
+
+    def extend(self, stop_limit:float=None):
+        """Index records until one of them would end a search"""
+        step = self.step
+        table = step.records
+        count = len(table)
+        while self.end < count:
+            index = self.end
+            self.end += 1
+            found = False
+            if table.day[index] != self._date:
+                self.day_bounds.append(index)
+                self._date = table.day[index]
+                found = True
+            if step.continuous and not step.continuous.match(table, index):
+                self.breaks.append(index)
+                found = True
+            if step.duration:
+                stop = table.stop(index)
+                if self._stops and stop < self._stops[-1]:
+                    self.descents.append(index)
+                self._stops.append(stop)
+                found = found or (stop_limit is not None and stop > stop_limit)
+            if step.last_rule.match(table, index):
+                key = table.title[index] if step.exact_title else None
+                self.matches.setdefault(key, []).append(index)
+            if found:
+                return
+
+    def find_stop_after(self, stop_limit:float, first:int, last:int) -> int:
+        """Find the first record (in a run of non-decreasing stop times) after the limit"""
+        return self.start + bisect_right(self._stops, stop_limit,
+                                         first - self.start, last - self.start)
+
+    def stop(self, index:int) -> float:
+        """Get the stop time of an indexed record"""
+        return self._stops[index - self.start]
+
+def _next_position(positions:list[int], index:int, default:int) -> int:
+    """Get the first position after the index (limited to the default)"""
+    found = bisect_right(positions, index)
+    if found < len(positions):
+        return min(positions[found], default)
+    return default
+
+def _select_by_duration(prev_activity:Activity, next_activity:Activity, method:str) -> Activity:
+    dur1 = prev_activity.duration
+    dur2 = next_activity.duration
+    if method == 'shortest':
+        return next_activity if dur1 > dur2 else prev_activity
+    if method == 'longest':
+        return next_activity if dur1 < dur2 else prev_activity
+    return prev_activity
+
+def _compile_title(re_crits) -> re.Pattern:
+    """Merge one or more title regular expressions into a single pattern"""
+    if isinstance(re_crits, str):
+        re_crits = [re_crits]
+    try:
+        return re.compile('|'.join(f'(?:{re_str})' for re_str in re_crits),
+                          flags=re.IGNORECASE)
+    except re.error:
+        # Patterns with global flags or group references cannot be merged
+        patterns = [re.compile(re_str, flags=re.IGNORECASE) for re_str in re_crits]
+        return _AnyPattern(patterns)
+
+class _MatchCache():
+    """Search results of a pattern memoized for each distinct string
+
+    The results are kept in a string memo, which holds at most a few
+    thousand strings besides the strings of the current table. Every string
+    that the pattern matches contains one of the required literals (if any),
+    so the pattern is not searched in the strings where the literal filter
+    finds none of them."""
+    # pylint: disable=too-few-public-methods
+    def __init__(self, pattern:re.Pattern, literals:frozenset[str]=None):
+        self.pattern = pattern
+        self.literals = literals
+        self.literal_filter:LiteralFilter = None
+        self._memo = StringMemo(self._search)
+
+    def search(self, strings:list[str], string_id:int) -> bool:
+        """Search a string of the strings list for the pattern"""
+        return self._memo.get(strings, string_id)
+
+    def _search(self, strings:list[str], string_id:int) -> bool:
+        literal_filter = self.literal_filter
+        if literal_filter and self.literals.isdisjoint(literal_filter.find(strings, string_id)):
+            return False
+        return bool(self.pattern.search(strings[string_id]))
+
+class _AnyPattern():
+    """Match any of several regular expressions that could not be merged"""
+    # pylint: disable=too-few-public-methods
+    def __init__(self, patterns:list[re.Pattern]):
+        self.patterns = patterns
+
+    def search(self, string:str) -> bool:
+        """Search the string for any of the patterns"""
+        return any(pattern.search(string) for pattern in self.patterns)
+
+def _get_pattern_literals(pattern) -> frozenset[str]:
+    """Get the required literals of a title pattern (None if any title could match)"""
+    if isinstance(pattern, _AnyPattern):
+        literals = [get_required_literals(each) for each in pattern.patterns]
+        return None if None in literals else frozenset().union(*literals)
+    return get_required_literals(pattern)
+
+def _get_duration_window(window:dict) -> tuple:
+    min_duration = _get_seconds(window, 'min', None, 'duration')
+    max_duration = _get_seconds(window, 'max', None, 'duration')
+    if None not in (min_duration, max_duration) and min_duration > max_duration:
+        raise ValueError('The minimum duration is longer than the maximum')
+    return min_duration, max_duration
+
+def _get_seconds(window:dict, key:str, default:str, name:str) -> int:
+    """Get the seconds of an "HH:MM" value of a window (00:00 to 24:00)"""
+    text = window.get(key, default)
+    if text is None:
+        return None
+    if not isinstance(text, str) or not _TIME_FORMAT.fullmatch(text):
+        raise ValueError(f'Invalid {name} {key} "{text}" (use HH:MM from 00:00 to 24:00)')
+    return 3600 * int(text[:2]) + 60 * int(text[3:])
+
+def _get_tod_window(window:dict) -> tuple[int, int]:
+    min_tod = _get_seconds(window, 'min', '00:00', 'started_at')
+    max_tod = _get_seconds(window, 'max', '23:59', 'started_at')
+    if min_tod >= _SECONDS_PER_DAY:
+        raise ValueError('The earliest started_at must be before 24:00')
+    if min_tod > max_tod:
+        raise ValueError('The earliest started_at is later than the latest')
+    return min_tod, max_tod
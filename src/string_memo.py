@@ -0,0 +1,42 @@
+"""Memo of the results of a function for the distinct strings of record tables"""
+
+_MEMO_SIZE = 4096       # strings kept for the next tables
+
+class StringMemo():
+    """Results of a function memoized for each distinct string
+
+    The results are kept by string id for the strings list of the current
+    table, so each string of a table is only looked up once (for as long as
+    that table is used). The results are also kept by string, so a new table
+    (such as the next day, or the time card of the tracker) does not call
+    the function again for the strings that come back. These results are
+    cleared when there are too many of them, so the memory does not grow
+    with every distinct string. The function gets the strings list and the
+    string id."""
+    # pylint: disable=too-few-public-methods; A memo only gets results
+    def __init__(self, function, size:int=_MEMO_SIZE):
+        self.function = function
+        self.size = size
+        self._strings:list[str] = None
+        self._by_id:list = []
+        self._by_string:dict = {}
+
+    def get(self, strings:list[str], string_id:int):
+        """Get the result of a string of the strings list"""
+        if strings is not self._strings:
+            self._strings = strings
+            self._by_id = []
+        by_id = self._by_id
+        if string_id >= len(by_id):
+            by_id.extend([None] * (len(strings) - len(by_id)))
+        result = by_id[string_id]
+        if result is None:
+            by_string = self._by_string
+            string = strings[string_id]
+            result = by_string.get(string)
+            if result is None:
+                if len(by_string) >= self.size:
+                    by_string.clear()
+                result = by_string[string] = self.function(strings, string_id)
+            by_id[string_id] = result
+        return result
@@ -1,27 +1,52 @@
 """ActivityLogger for logging user activity."""
 
 from argparse import ArgumentParser
-from datetime import timedelta
-from logging import info
+from datetime import datetime, timedelta
 from pathlib import Path
+from queue import Empty, Queue
 import sys
-import time
+from tempfile import mkdtemp
+from threading import Event, Thread
 
-from logfile import LogFile
-from windows_activity import WindowsActivity
+from activity_source import ActivitySource
+from analyze import LiveAnalysis
+from logfile import LogFile, LogWriter
 from record import Record
+from sampler import ActivitySampler
 
+_FLUSH_SECONDS = 10.0
 _INACTIVE_AFTER_SECONDS = 7.0 * 60
 _LOG_FOLDER = '.'
+_POLL_SECONDS = 0.1             # key and log buffer check period
 _SECONDS_BETWEEN_CHECKS = 2.0
 
 def parse_arguments():
     """Get user-selected options for tracking user activity"""
     parser = ArgumentParser()
     parser.description = """Create a log of user's weekly activity"""
+    parser.add_argument('-c', '--config',
+                        type=str,
+                        help='Analysis configuration JSON file for a live time card'
+                            ' (press \'t\' to print it)')
     parser.add_argument('-f', '--folder',
-                        type=str, default=_LOG_FOLDER,
-                        help='Folder path for log files')
+                        type=str,
+                        help='Folder path for log files (default=., or a new temporary folder'
+                            ' for a replay)')
+    parser.add_argument('--flush',
+                        type=float, default=_FLUSH_SECONDS,
+                        help='Longest time that records wait to be written (default=10.0s)')
+    parser.add_argument('--fsync',
+                        action='store_true',
+                        help='Force the written records to the disk')
+    parser.add_argument('--fake',
+                        action='store_true',
+                        help='Simulate the user activity (runs on any platform)')
+    parser.add_argument('--replay',
+                        type=str,
+                        help='Replay the user activity of a log file (runs on any platform)')
+    parser.add_argument('--speed',
+                        type=float, default=0,
+                        help='Speed-up factor of a replay (default=0, as fast as possible)')
     parser.add_argument('-i', '--inactive',
                         type=int, default=_INACTIVE_AFTER_SECONDS,
                         help='User inactive after specified seconds (default=7 x 60)')
@@ -31,25 +56,54 @@ def parse_arguments():
     return parser.parse_args()
 
 def main():
-    """Run a periodic loop to monitor the user's activity"""
-    args = parse_arguments()
-    LogFile.prepare(args.folder)
-    print(Record.header_text())
-    info('\n%s', Record.header_text())
+    """Monitor the user's activity until the user presses the 'q' key
 
-    user_activity = Record()
-    winact = WindowsActivity()
+    The activity is sampled in this thread, since the Windows (COM) objects
+    belong to it. Key handling and log writing run in their own threads, so
+    a slow sample never delays them (and a slow write never delays a sample).
+    New records and time card requests are passed to the writer in a queue."""
+    args = parse_arguments()
+    live = None
+    if args.config:
+        live = LiveAnalysis.from_config_file(args.config)
+    winact = _get_activity_source(args)
+    with LogWriter(_get_log_folder(args), Record.header_text(),
+                   flush_seconds=args.flush, sync=args.fsync) as writer:
+        if args.replay:
+            _check_replay_output(args.replay, winact.now(), winact.end_time(), writer)
+        filename = Path(writer.get_filename(winact.now()))
+        if live and filename.is_file() and filename.stat().st_size:
+            live.add_table(LogFile.read_table(str(filename)))
+        print(Record.header_text())
 
-    while True:
-        user_activity = _check_user_activity(user_activity, winact, args.inactive)
-        _quit_on_key()
-        time.sleep(args.sample)
+        sampler = ActivitySampler(winact, args.inactive, args.sample)
+        records = Queue()
+        stop = Event()
+        threads = [Thread(target=_write_records, args=(records, writer, live), daemon=True),
+                   Thread(target=_handle_keys, args=(records, sampler, stop, live), daemon=True)]
+        for thread in threads:
+            thread.start()
+        try:
+            user_activity = Record()
+            running = True
+            while running:
+                record = _check_user_activity(user_activity, sampler, args.inactive)
+                if record is not user_activity:
+                    records.put(record)
+                user_activity = record
+                running = sampler.wait(stop)
+        finally:
+            stop.set()
+            records.put(None)
+            for thread in threads:
+                thread.join()
+        print(sampler.stats)
 
-def _check_user_activity(user_activity:Record, winact:WindowsActivity, inactive:int):
+def _check_user_activity(user_activity:Record, sampler:ActivitySampler, inactive:int):
     # Check for any new user activity
     # pylint: disable=bare-except
     try:
-        current = _get_current_record(winact, inactive)
+        current = sampler.sample()
 
         active_changed = user_activity.active != current.active
         if active_changed:
@@ -64,29 +118,76 @@ def _check_user_activity(user_activity:Record, winact:WindowsActivity, inactive:
                             user_activity.app != current.app)
         if active_changed or window_changed:
             print(current.raw_text())
-            info(current.raw_text())
             return current
     except:
         pass
     return user_activity
 
-def _quit_on_key():
-    # Check if the user pressed the 'q' key to quit
-    keypress = WindowsActivity.get_keypress()
-    if keypress in ['q', 'Q']:
-        sys.exit(0)
-    if keypress:
-        print("Press 'q' to quit")
-
-def _get_current_record(winact:WindowsActivity, inactive:int) -> Record:
-    uptime = winact.get_uptime_ms()
-    user_input_ms = winact.get_user_input_ms()
-    idle_ms = uptime - user_input_ms
-    active = idle_ms < (1000 * inactive)
-    hwnd = winact.get_active_window_handle()
-    title = winact.get_window_title(hwnd)
-    app = Path(winact.get_app_path(hwnd)).name.lower()
-    return Record(active, hwnd, title, app)
+def _check_replay_output(replay:str, start:datetime, end:datetime, writer:LogWriter):
+    """Stop before a replay writes to the log file that it replays"""
+    source = Path(replay).resolve()
+    week = start - timedelta(days=start.weekday())
+    while week.date() <= end.date():
+        if Path(writer.get_filename(week)).resolve() == source:
+            sys.exit(f'\nERROR: The replay of "{replay}" would be written to the same file'
+                     ' (select another folder)')
+        week += timedelta(days=7)
+
+def _get_activity_source(args) -> ActivitySource:
+    # pylint: disable=import-outside-toplevel; The Windows source only imports on Windows
+    if args.replay:
+        from replay_activity import ReplayActivity
+        return ReplayActivity(args.replay, args.speed)
+    if args.fake:
+        from fake_activity import FakeActivity
+        return FakeActivity()
+    from windows_activity import WindowsActivity
+    return WindowsActivity()
+
+def _get_log_folder(args) -> str:
+    # A replay only writes to the log folder when it is selected
+    if args.folder:
+        return args.folder
+    if args.replay:
+        folder = mkdtemp(prefix='replay-')
+        print(f'Replay log folder: {folder}')
+        return folder
+    return _LOG_FOLDER
+
+def _handle_keys(records:Queue, sampler:ActivitySampler, stop:Event, live:LiveAnalysis):
+    # Check if the user pressed the 'q' key to quit (or another command key)
+    while not stop.wait(_POLL_SECONDS):
+        keypress = sampler.winact.get_keypress()
+        if keypress in ['q', 'Q']:
+            stop.set()
+        elif keypress in ['s', 'S']:
+            print(sampler.stats)
+        elif keypress in ['t', 'T'] and live:
+            records.put(keypress)
+        elif keypress:
+            print("Press 'q' to quit, 's' to print the sampling statistics" +
+                  (" or 't' to print the time card" if live else ''))
+
+def _write_records(records:Queue, writer:LogWriter, live:LiveAnalysis):
+    # Write the new records (and print the time card when asked) until None is received
+    # pylint: disable=bare-except; A failed write must not stop the writer thread
+    while True:
+        try:
+            item = records.get(timeout=_POLL_SECONDS)
+        except Empty:
+            writer.poll()
+            continue
+        if item is None:
+            return
+        try:
+            if isinstance(item, Record):
+                writer.write(item.raw_text(), item.start)
+                if live:
+                    live.add_record(item)
+            else:
+                live.print_time_card()
+        except:
+            pass
 
 if __name__ == '__main__':
     main()
@@ -1,13 +1,22 @@
 """Access information about user activity on the Windows platform"""
 
+from collections import OrderedDict
 import ctypes
-from ctypes import Structure, POINTER, WINFUNCTYPE
+from ctypes import Structure, POINTER, WINFUNCTYPE, c_uint64
 from ctypes.wintypes import BOOL, UINT, DWORD
+from datetime import datetime
 import msvcrt
+import pywintypes
 import wmi
+import win32api
+import win32con
 import win32gui
 import win32process
 
+from activity_source import SystemClock
+
+_APP_PATH_CACHE_SIZE = 256
+_DWORD_MASK = 0xFFFFFFFF
 _INVALID_PID_VALUE = -1
 _INVALID_HANDLE_VALUE = -1
 
@@ -19,11 +28,22 @@ class LASTINPUTINFO(Structure):
         ("dwTime", DWORD)
     ]
 
-class WindowsActivity():
+class WindowsActivity(SystemClock):
     """Utilities to get user activity on the Windows platform"""
 
     def __init__(self):
         self._wmi = wmi.WMI()
+        self._app_paths:OrderedDict[tuple[int,datetime],str] = OrderedDict()
+
+        # Bind the Windows functions once, since they are called on every sample
+        self._get_tick_count = WINFUNCTYPE(c_uint64)(
+            ("GetTickCount64", ctypes.windll.kernel32))
+        self._get_last_input_info = WINFUNCTYPE(BOOL, POINTER(LASTINPUTINFO))(
+            ("GetLastInputInfo", ctypes.windll.user32))
+        self._last_input_info = LASTINPUTINFO()
+        # pylint: disable=attribute-defined-outside-init; Structure classes do not use __init__()
+        # pylint: disable=invalid-name; Use cbSize structure member name as defined by Microsoft
+        self._last_input_info.cbSize = ctypes.sizeof(LASTINPUTINFO)
 
     @staticmethod
     def get_active_window_handle() -> int:
@@ -32,14 +52,14 @@ class WindowsActivity():
         return win32gui.GetForegroundWindow()
 
     def get_app_path(self, hwnd) -> str:
-        """Get the path to the application that owns the window handle"""
+        """Get the path to the application that owns the window handle
+
+        The paths are cached for each process, since a WMI query is slow."""
         path = ''
         if hwnd != _INVALID_HANDLE_VALUE:
             pid = self._get_process_id(hwnd)
             if pid != _INVALID_PID_VALUE:
-                for process in self._wmi.query(
-                        f'SELECT ExecutablePath FROM Win32_Process WHERE ProcessId = {pid}'):
-                    path = process.ExecutablePath
+                path = self._get_cached_app_path(pid)
         return path
 
     @staticmethod
@@ -49,29 +69,19 @@ class WindowsActivity():
             return chr(ord(msvcrt.getch()))
         return ''
 
-    @staticmethod
-    def get_uptime_ms() -> int:
+    def get_uptime_ms(self) -> int:
         """Get the time (ms) that the machine has been running"""
-        prototype = WINFUNCTYPE(DWORD)
-        paramflags = ()
-        # pylint: disable=invalid-name; Use GetTickCount() function name as defined by Microsoft
-        GetTickCount = prototype(("GetTickCount", ctypes.windll.kernel32), paramflags)
-        return GetTickCount()
+        return self._get_tick_count()
 
-    @staticmethod
-    def get_user_input_ms() -> int:
-        """Get the machine uptime (ms) associated with the last user input"""
-        prototype = WINFUNCTYPE(BOOL, POINTER(LASTINPUTINFO))
-        paramflags = ((3, "plii"),)
-        # pylint: disable=invalid-name; Use GetLastInputInfo() function name as defined by Microsoft
-        GetLastInputInfo = prototype(("GetLastInputInfo", ctypes.windll.user32), paramflags)
-
-        last_input_info = LASTINPUTINFO()
-        # pylint: disable=attribute-defined-outside-init; Structure classes do not use __init__()
-        # pylint: disable=invalid-name; Use cbSize structure member name as defined by Microsoft
-        last_input_info.cbSize = ctypes.sizeof(LASTINPUTINFO)
-        assert 0 != GetLastInputInfo(last_input_info)
-        return last_input_info.dwTime
+    def get_user_input_ms(self) -> int:
+        """Get the machine uptime (ms) associated with the last user input
+
+        Windows only keeps the 32-bit tick count of the last input, which
+        wraps around every 49.7 days. It is extended to the 64-bit uptime."""
+        if not self._get_last_input_info(self._last_input_info):
+            raise ctypes.WinError()
+        uptime = self._get_tick_count()
+        return uptime - ((uptime - self._last_input_info.dwTime) & _DWORD_MASK)
 
     @staticmethod
     def get_window_title(hwnd) -> str:
@@ -81,6 +91,52 @@ class WindowsActivity():
         # pylint: disable=c-extension-no-member; Allow calls to win32gui methods
         return win32gui.GetWindowText(hwnd)
 
+    @staticmethod
+    def _get_process_start(pid:int) -> datetime:
+        """Get the creation time of a process (None if the process cannot be opened)
+
+        A process ID can be reused after the process exits, so the process
+        is identified by both its ID and its creation time."""
+        # pylint: disable=c-extension-no-member; Allow calls to win32api and win32process methods
+        try:
+            handle = win32api.OpenProcess(win32con.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        except pywintypes.error:
+            return None
+        try:
+            return win32process.GetProcessTimes(handle)['CreationTime']
+        except pywintypes.error:
+            return None
+        finally:
+            win32api.CloseHandle(handle)
+
+    def _get_cached_app_path(self, pid:int) -> str:
+        """Get the executable path of a process from the LRU cache (or query it)
+
+        The cache key is the process ID and creation time. If the creation
+        time cannot be read, the path is not cached, since the process ID may
+        belong to another process on the next lookup."""
+        started = self._get_process_start(pid)
+        if started is None:
+            return self._query_app_path(pid)
+        key = (pid, started)
+        path = self._app_paths.get(key)
+        if path is None:
+            path = self._query_app_path(pid)
+            self._app_paths[key] = path
+            if len(self._app_paths) > _APP_PATH_CACHE_SIZE:
+                self._app_paths.popitem(last=False)
+        else:
+            self._app_paths.move_to_end(key)
+        return path
+
+    def _query_app_path(self, pid:int) -> str:
+        """Query the executable path of a process"""
+        path = ''
+        for process in self._wmi.query(
+                f'SELECT ExecutablePath FROM Win32_Process WHERE ProcessId = {pid}'):
+            path = process.ExecutablePath
+        return path
+
     @staticmethod
     def _get_process_id(hwnd) -> int:
         # pylint: disable=c-extension-no-member; Allow calls to win32process methods
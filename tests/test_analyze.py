@@ -0,0 +1,67 @@
+"""Tests of the reports of a log file whose days come back (like concatenated log files)
+
+The report of the checkpoint (*.tabs) and of the streaming mode must be the
+same as the report of the whole log file."""
+
+from io import StringIO
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+_ROOT_FOLDER = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT_FOLDER / 'src'))
+
+# pylint: disable=wrong-import-position; The modules are imported from the src folder
+import analyze
+
+_LOGIN = 'user'
+_RECORDS = [
+    ('2023-01-02 08:00:00', 'active', 'Zephyr build - Code', 'code.exe'),
+    ('2023-01-02 11:30:00', 'inactive', 'Zephyr build - Code', 'code.exe'),
+    ('2023-01-02 12:00:00', 'active', 'Inbox - Outlook', 'outlook.exe'),
+    ('2023-01-02 17:00:00', 'inactive', 'Inbox - Outlook', 'outlook.exe'),
+    ('2023-01-03 08:00:00', 'active', 'Zephyr build - Code', 'code.exe'),
+    ('2023-01-03 17:00:00', 'inactive', 'Zephyr build - Code', 'code.exe'),
+    ('2023-01-02 12:30:00', 'inactive', 'Inbox - Outlook', 'outlook.exe'),     # Monday again
+    ('2023-01-02 13:15:00', 'active', 'Inbox - Outlook', 'outlook.exe'),
+    ('2023-01-02 13:30:00', 'inactive', 'Inbox - Outlook', 'outlook.exe'),
+]
+
+class TestReturningDay(TestCase):
+    """The lunch of Monday is only selected once, among the records of both Monday runs"""
+
+    def setUp(self):
+        # pylint: disable=consider-using-with; The folder is removed by the cleanup
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.logfile = Path(folder.name) / f'{_LOGIN}-2023-01-02.tab'
+        self.logfile.write_text(
+            '\nTime\tUser_Active\tWindow_Handle\tTitle\tApplication\n' +
+            ''.join(f'{start}\t{active}\t00001234\t{title}\t{app}\n'
+                    for start, active, title, app in _RECORDS), encoding='utf-8')
+        getlogin = mock.patch('logfile.getlogin', return_value=_LOGIN)
+        getlogin.start()
+        self.addCleanup(getlogin.stop)
+        self.whole = self._report('--from', '2023-01-02')
+
+    def test_checkpoint(self):
+        """The report is the same before and after the checkpoint is saved"""
+        self.assertEqual(self._report(str(self.logfile)), self.whole)
+        self.assertEqual(self._report(str(self.logfile)), self.whole)
+
+    def test_stream(self):
+        """The report is the same when the log file is analyzed one day at a time"""
+        self.assertEqual(self._report('--stream', str(self.logfile)), self.whole)
+
+    def _report(self, *args:str) -> str:
+        argv = ['analyze.py', '-c', str(_ROOT_FOLDER / 'dist' / 'analysis.json'),
+                '-f', self.folder, *args]
+        with mock.patch.object(sys, 'argv', argv), mock.patch('builtins.input'), \
+                mock.patch('sys.stdout', new_callable=StringIO) as output:
+            analyze.main()
+        return output.getvalue()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Tests of the memo of the results of the distinct strings of record tables"""
+
+from pathlib import Path
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+# pylint: disable=wrong-import-position; The modules are imported from the src folder
+from string_memo import StringMemo
+
+class TestStringMemo(unittest.TestCase):
+    """Each string is looked up once per table and the memo stays within its size"""
+
+    def setUp(self):
+        self.calls:list[str] = []
+        self.memo = StringMemo(self._get_length, size=3)
+
+    def test_same_table(self):
+        """Each string of a table is looked up once (even past the size)"""
+        strings = ['Inbox', 'Code', 'Notepad', 'Paint', 'Chrome']
+        for _ in range(2):
+            self.assertEqual([self.memo.get(strings, index) for index in range(len(strings))],
+                             [5, 4, 7, 5, 6])
+        self.assertEqual(self.calls, strings)
+
+    def test_next_table(self):
+        """The strings that come back in a new table are not looked up again"""
+        self.memo.get(['Inbox', 'Code'], 1)
+        self.assertEqual(self.memo.get(['Code', 'Inbox'], 0), 4)
+        self.assertEqual(self.calls, ['Code'])
+
+    def test_size(self):
+        """The strings of the previous tables are cleared past the size"""
+        for string in ['Inbox', 'Code', 'Notepad', 'Paint']:
+            self.memo.get([string], 0)
+        self.memo.get(['Inbox'], 0)
+        self.assertEqual(self.calls, ['Inbox', 'Code', 'Notepad', 'Paint', 'Inbox'])
+
+    def _get_length(self, strings:list[str], string_id:int) -> int:
+        self.calls.append(strings[string_id])
+        return len(strings[string_id])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Tests of replaying a log file with the tracker
+
+The replay runs as fast as possible, so the tests also run on Linux."""
+
+from contextlib import redirect_stdout
+import io
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+# pylint: disable=wrong-import-position; The modules are imported from the src folder
+import track
+
+_LOGIN = 'user'
+_LOG_TEXT = ('\nTime\tUser_Active\tWindow_Handle\tTitle\tApplication\n'
+             '2023-01-02 07:00:00\tactive\t00067DB3\tInbox - Outlook\toutlook.exe\n'
+             '2023-01-02 07:00:30\tactive\t000ED58D\tZephyr build - Code\tcode.exe\n'
+             '2023-01-02 07:01:10\tinactive\t000ED58D\tZephyr build - Code\tcode.exe\n'
+             '2023-01-02 07:20:00\tactive\t00067DB3\tInbox - Outlook\toutlook.exe\n')
+
+class TestReplay(unittest.TestCase):
+    """Replays of a log file never write to the replayed log file"""
+
+    def setUp(self):
+        # pylint: disable=consider-using-with; The folder is removed by the cleanup
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = Path(folder.name)
+        self.source = self.folder / f'{_LOGIN}-2023-01-02.tab'
+        self.source.write_text(_LOG_TEXT, encoding='utf-8')
+        getlogin = mock.patch('logfile.getlogin', return_value=_LOGIN)
+        getlogin.start()
+        self.addCleanup(getlogin.stop)
+
+    def test_temporary_folder(self):
+        """Without a folder, the replay is written to a new temporary folder"""
+        output = self.folder / 'replay'
+        with mock.patch('track.mkdtemp', return_value=str(output)):
+            self._track('--replay', str(self.source))
+        self.assertEqual(self.source.read_text(encoding='utf-8'), _LOG_TEXT)
+        replayed = (output / self.source.name).read_text(encoding='utf-8')
+        self.assertIn('Zephyr build - Code', replayed)
+
+    def test_same_file(self):
+        """A replay into the folder of the replayed log file stops before writing"""
+        with self.assertRaises(SystemExit):
+            self._track('--replay', str(self.source), '--folder', str(self.folder))
+        self.assertEqual(self.source.read_text(encoding='utf-8'), _LOG_TEXT)
+
+    @staticmethod
+    def _track(*args:str):
+        with mock.patch.object(sys, 'argv', ['track.py', *args]), redirect_stdout(io.StringIO()):
+            track.main()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests of the process path cache of WindowsActivity with a fake WMI backend
+
+The Windows modules are replaced by fakes, so the tests also run on Linux."""
+
+import ctypes
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+from types import ModuleType, SimpleNamespace
+import unittest
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+_START = datetime(2024, 1, 1, 8, 0)
+
+class FakeError(Exception):
+    """Fake pywintypes.error"""
+
+class FakeSystem():
+    """Fake processes and windows (each window handle belongs to the process with the same ID)"""
+    def __init__(self):
+        self.processes:dict[int,tuple[datetime,str]] = {}
+        self.protected:set[int] = set()
+        self.queries = 0
+
+    def start(self, pid:int, path:str, minutes:int=0):
+        """Start a process (replacing any process with the same ID)"""
+        self.processes[pid] = (_START + timedelta(minutes=minutes), path)
+
+    def open_process(self, _access, _inherit, pid:int) -> int:
+        """Fake win32api.OpenProcess (the handle is the process ID)"""
+        if pid in self.protected or pid not in self.processes:
+            raise FakeError('Access is denied')
+        return pid
+
+    def get_process_times(self, handle:int) -> dict:
+        """Fake win32process.GetProcessTimes"""
+        return {'CreationTime': self.processes[handle][0]}
+
+    def query(self, wql:str) -> list:
+        """Fake WMI query of the executable path of a process"""
+        self.queries += 1
+        pid = int(wql.rsplit('=', 1)[1])
+        if pid not in self.processes:
+            return []
+        return [SimpleNamespace(ExecutablePath=self.processes[pid][1])]
+
+def _get_fake_modules(system:FakeSystem) -> dict[str,ModuleType]:
+    modules = {name: ModuleType(name) for name in (
+        'msvcrt', 'pywintypes', 'wmi', 'win32api', 'win32con', 'win32gui', 'win32process')}
+    modules['pywintypes'].error = FakeError
+    modules['wmi'].WMI = lambda: SimpleNamespace(query=system.query)
+    modules['win32api'].OpenProcess = system.open_process
+    modules['win32api'].CloseHandle = lambda handle: None
+    modules['win32con'].PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    modules['win32process'].GetProcessTimes = system.get_process_times
+    modules['win32process'].GetWindowThreadProcessId = lambda hwnd: (1, hwnd)
+    return modules
+
+class AppPathCacheTest(unittest.TestCase):
+    """Cache of the executable paths for each process ID and creation time"""
+
+    def setUp(self):
+        self.system = FakeSystem()
+        patches = [mock.patch.dict(sys.modules, _get_fake_modules(self.system)),
+                   mock.patch.object(ctypes, 'WINFUNCTYPE', mock.MagicMock(), create=True),
+                   mock.patch.object(ctypes, 'windll', mock.MagicMock(), create=True)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        sys.modules.pop('windows_activity', None)
+        self.addCleanup(sys.modules.pop, 'windows_activity', None)
+        # pylint: disable=import-outside-toplevel; The fake Windows modules must be installed first
+        import windows_activity
+        self.module = windows_activity
+        self.winact = windows_activity.WindowsActivity()
+
+    def test_cache_hit(self):
+        """The path of a process is only queried once"""
+        self.system.start(10, r'C:\Apps\editor.exe')
+        self.assertEqual(self.winact.get_app_path(10), r'C:\Apps\editor.exe')
+        self.assertEqual(self.winact.get_app_path(10), r'C:\Apps\editor.exe')
+        self.assertEqual(self.system.queries, 1)
+
+    def test_lru_eviction(self):
+        """The least recently used process is evicted when the cache is full"""
+        size = self.module._APP_PATH_CACHE_SIZE  # pylint: disable=protected-access
+        for pid in range(1, size + 1):
+            self.system.start(pid, f'app{pid}.exe')
+            self.winact.get_app_path(pid)
+        self.winact.get_app_path(1)                     # process 2 is now the oldest
+        self.system.start(size + 1, 'new.exe')
+        self.winact.get_app_path(size + 1)
+        queries = self.system.queries
+        self.assertEqual(self.winact.get_app_path(1), 'app1.exe')
+        self.assertEqual(self.system.queries, queries)
+        self.assertEqual(self.winact.get_app_path(2), 'app2.exe')
+        self.assertEqual(self.system.queries, queries + 1)
+
+    def test_reused_pid(self):
+        """A new process with the ID of an exited process gets its own path"""
+        self.system.start(20, 'old.exe')
+        self.assertEqual(self.winact.get_app_path(20), 'old.exe')
+        self.system.start(20, 'new.exe', minutes=5)
+        self.assertEqual(self.winact.get_app_path(20), 'new.exe')
+
+    def test_process_cannot_be_opened(self):
+        """The path is not cached if the process creation time cannot be read"""
+        self.system.start(30, 'old.exe')
+        self.system.protected.add(30)
+        self.assertEqual(self.winact.get_app_path(30), 'old.exe')
+        self.system.start(30, 'new.exe', minutes=5)
+        self.assertEqual(self.winact.get_app_path(30), 'new.exe')
+        self.assertEqual(self.system.queries, 2)
+
+    def test_invalid_window(self):
+        """The invalid window handle has no path and is not queried"""
+        self.assertEqual(self.winact.get_app_path(-1), '')
+        self.assertEqual(self.system.queries, 0)
+
+if __name__ == '__main__':
+    unittest.main()